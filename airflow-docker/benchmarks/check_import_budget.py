@@ -0,0 +1,146 @@
+"""
+Cek anggaran waktu parsing DAG dan dependensi berat yang ikut ter-import.
+
+    cd airflow-docker/benchmarks
+    python check_import_budget.py --budget-ms 300 --repeat 5
+
+Setiap percobaan berjalan di interpreter baru: modul airflow yang di-import DAG
+dimuat lebih dulu (baseline), lalu file DAG di-import dan diukur. Modul yang baru
+muncul setelah baseline dianggap dibawa oleh file DAG; jika salah satunya termasuk
+--forbid (default: pandas, numpy, requests, sqlalchemy, psycopg2, ...) atau median
+waktu import melebihi --budget-ms, skrip keluar dengan exit code 1.
+Modul terlarang yang sudah dimuat oleh airflow sendiri tidak dihitung.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DAGS_DIR = os.path.join(os.path.dirname(BENCH_DIR), "dags")
+DEFAULT_DAG_FILE = os.path.join(DAGS_DIR, "bps_simdasi_pipeline.py")
+DEFAULT_FORBIDDEN = ["pandas", "numpy", "requests", "urllib3", "sqlalchemy", "psycopg2"]
+
+# Dijalankan di interpreter baru: argv = dags_dir, dag_file, baseline modules (JSON)
+_PROBE = r"""
+import importlib, importlib.util, io, contextlib, json, sys, time
+dags_dir, dag_file, baseline = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+sys.path.insert(0, dags_dir)
+start = time.perf_counter()
+for name in baseline:
+    importlib.import_module(name)
+baseline_s = time.perf_counter() - start
+before = set(sys.modules)
+spec = importlib.util.spec_from_file_location("_dag_under_test", dag_file)
+module = importlib.util.module_from_spec(spec)
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    spec.loader.exec_module(module)
+dag_s = time.perf_counter() - start
+print(json.dumps({"baseline_s": baseline_s, "dag_s": dag_s, "new_modules": sorted(set(sys.modules) - before)}))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cek waktu parsing DAG dan import dependensi berat.")
+    parser.add_argument("--dag-file", default=DEFAULT_DAG_FILE)
+    parser.add_argument("--budget-ms", type=float, default=300.0,
+                        help="batas median waktu import file DAG (di luar import airflow)")
+    parser.add_argument("--repeat", type=int, default=5, help="jumlah interpreter baru yang diukur")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="paket yang tidak boleh ter-import saat parsing")
+    parser.add_argument("--importtime", action="store_true",
+                        help="tampilkan modul paling lambat yang dibawa file DAG (python -X importtime)")
+    return parser.parse_args()
+
+
+def airflow_imports(dag_file: str) -> List[str]:
+    """Modul airflow yang di-import di level atas file DAG (dipakai sebagai baseline)."""
+    with open(dag_file, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=dag_file)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name.split(".")[0] == "airflow" and name not in modules)
+    return modules
+
+
+def probe(dag_file: str, baseline: List[str], importtime: bool = False) -> Dict[str, Any]:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", _PROBE, os.path.dirname(os.path.abspath(dag_file)), dag_file, json.dumps(baseline)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "probe gagal")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["importtime"] = proc.stderr if importtime else None
+    return result
+
+
+def slowest_imports(importtime_log: str, modules: List[str], limit: int = 10) -> List[tuple]:
+    """Mengambil (cumulative_us, modul) dari log -X importtime untuk modul yang dibawa file DAG."""
+    wanted = set(modules)
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        name = name.strip()
+        if name in wanted and cumulative.strip().isdigit():
+            rows.append((int(cumulative.strip()), name))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main() -> int:
+    args = parse_args()
+    baseline = airflow_imports(args.dag_file)
+    print(f"🔬 Cek import {os.path.basename(args.dag_file)} ({args.repeat}x, baseline: {', '.join(baseline) or '-'})")
+
+    runs = []
+    try:
+        for _ in range(args.repeat):
+            runs.append(probe(args.dag_file, baseline))
+        if args.importtime:
+            runs.append(probe(args.dag_file, baseline, importtime=True))
+    except RuntimeError as e:
+        print(f"❌ File DAG gagal di-import: {e}")
+        return 2
+
+    dag_ms = statistics.median(run["dag_s"] for run in runs[:args.repeat]) * 1000
+    baseline_ms = statistics.median(run["baseline_s"] for run in runs[:args.repeat]) * 1000
+    new_modules = sorted(set().union(*(run["new_modules"] for run in runs)))
+    forbidden = sorted({name for name in new_modules if name.split(".")[0] in set(args.forbid)})
+    helpers = [name for name in new_modules if name.split(".")[0] == "bps_helpers"]
+
+    print(f"   import airflow (baseline): {baseline_ms:8.1f} ms")
+    print(f"   import file DAG (median):  {dag_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"   modul baru: {len(new_modules)}, bps_helpers: {', '.join(helpers) or '-'}")
+    if args.importtime:
+        for cumulative_us, name in slowest_imports(runs[-1]["importtime"], new_modules):
+            print(f"     {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if forbidden:
+        top_level = sorted({name.split(".")[0] for name in forbidden})
+        print(f"❌ Dependensi berat ter-import saat parsing: {', '.join(top_level)}")
+        failed = True
+    if dag_ms > args.budget_ms:
+        print(f"❌ Waktu import file DAG {dag_ms:.1f} ms melebihi budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ Parsing DAG dalam budget dan bebas dependensi berat.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+Benchmark end-to-end helper SIMDASI terhadap server stub lokal dan PostgreSQL lokal.
+
+    cd airflow-docker/benchmarks
+    python run_benchmarks.py --regions 500 --variables 20 --years 10 --latency-ms 50 \
+        --db-host localhost --db-port 5432 --db-password postgres
+    python run_benchmarks.py --skip-db --baseline results/bench_20250101T000000.json
+
+Hasil ditulis sebagai JSON (default: results/bench_<timestamp>.json). Dengan --baseline,
+median setiap tahap dibandingkan dengan hasil sebelumnya dan tahap yang melambat
+lebih dari --threshold (dan lebih dari --min-delta-ms) ditandai sebagai regresi (exit code 1).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DAGS_DIR = os.path.join(os.path.dirname(BENCH_DIR), "dags")
+sys.path.insert(0, DAGS_DIR)
+
+from stub_server import SimdasiStubServer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline SIMDASI dengan stub API lokal.")
+    parser.add_argument("--regions", type=int, default=500, help="jumlah baris label per tahun")
+    parser.add_argument("--variables", type=int, default=20, help="jumlah kolom variabel")
+    parser.add_argument("--years", type=int, default=10, help="jumlah tahun yang tersedia")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="latensi tambahan per respons stub")
+    parser.add_argument("--workers", type=int, default=None, help="BPS_FETCH_CONCURRENCY (default: settings)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-db", action="store_true", help="lewati benchmark save_to_postgres")
+    parser.add_argument("--db-host", default=os.getenv("PGHOST", "localhost"))
+    parser.add_argument("--db-port", default=os.getenv("PGPORT", "5432"))
+    parser.add_argument("--db-user", default=os.getenv("PGUSER", "postgres"))
+    parser.add_argument("--db-password", default=os.getenv("PGPASSWORD", ""))
+    parser.add_argument("--db-name", default=os.getenv("PGDATABASE", "postgres"))
+    parser.add_argument("--db-schema", default="bench_simdasi")
+    parser.add_argument("--output", default=None, help="path file JSON hasil")
+    parser.add_argument("--baseline", default=None, help="file JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=0.10, help="batas perlambatan median (0.10 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="perlambatan absolut minimum agar dianggap regresi (meredam noise tahap kecil)")
+    return parser.parse_args()
+
+
+def measure(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Menjalankan func sebanyak repeat kali (output print disembunyikan) dan merangkum durasinya."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            durations.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "min_s": min(durations),
+        "median_s": statistics.median(durations),
+        "mean_s": statistics.fmean(durations),
+        "max_s": max(durations),
+        "_result": result,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict[str, Any], baseline_path: str, threshold: float, min_delta_s: float) -> List[str]:
+    """Mencetak perubahan median per tahap terhadap baseline, mengembalikan daftar tahap yang regresi."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline_report = json.load(f)
+    baseline = baseline_report["results"]
+    results = report["results"]
+    regressions = []
+    print(f"\n📈 Perbandingan dengan baseline {baseline_path} ({baseline_report.get('git_commit')}):")
+    if baseline_report.get("params") != report["params"]:
+        print("⚠️ Parameter benchmark berbeda dengan baseline, perbandingan mungkin tidak sebanding.")
+    for stage, stats in results.items():
+        old = baseline.get(stage)
+        if not old:
+            print(f"   {stage:<34} (baru)")
+            continue
+        change = stats["median_s"] / old["median_s"] - 1 if old["median_s"] else 0.0
+        regressed = change > threshold and stats["median_s"] - old["median_s"] > min_delta_s
+        flag = "❌ REGRESI" if regressed else "✅"
+        print(f"   {stage:<34} {old['median_s']:.4f}s -> {stats['median_s']:.4f}s ({change:+.1%}) {flag}")
+        if regressed:
+            regressions.append(stage)
+    return regressions
+
+
+def main() -> int:
+    args = parse_args()
+    last_year = datetime.now().year - 1
+    years = list(range(last_year - args.years + 1, last_year + 1))
+
+    stub = SimdasiStubServer(n_regions=args.regions, n_variables=args.variables, years=years,
+                             latency_ms=args.latency_ms, seed=args.seed).start()
+
+    # Settings dibaca saat import, jadi environment harus diisi sebelum bps_helpers di-import
+    os.environ["BPS_API_BASE_URL"] = stub.base_url
+    os.environ["BPS_DATA_DIR"] = tempfile.mkdtemp(prefix="bps_bench_")
+    os.environ["BPS_ARCHIVE_ENABLED"] = "false"
+    if args.workers:
+        os.environ["BPS_FETCH_CONCURRENCY"] = str(args.workers)
+
+    from bps_helpers.catalog_cache import clear_catalog_cache
+    from bps_helpers.config.db_config import DB_CONFIG
+    from bps_helpers.config.settings import FETCH_CONCURRENCY
+    from bps_helpers.get_data_simdasi import get_available_years, handle_simdasi_detail_table, transpose_if_needed, plan_transpose, process_url
+    from bps_helpers.save_data_simdasi import save_to_postgres, bulk_load_with_unpivot
+
+    url = stub.detail_url()
+    table = "bench_detail"
+    results = {}
+
+    print(f"🔬 Benchmark: {args.regions} wilayah x {args.variables} variabel x {args.years} tahun, "
+          f"latensi {args.latency_ms} ms, {FETCH_CONCURRENCY} worker, {args.repeat} ulangan")
+
+    results["get_available_years_cold"] = measure(lambda: get_available_years(url), args.repeat,
+                                                  setup=clear_catalog_cache)
+    results["get_available_years_warm"] = measure(lambda: get_available_years(url), args.repeat)
+
+    requests_before = stub.request_count
+    results["handle_simdasi_detail_table"] = measure(
+        lambda: handle_simdasi_detail_table(url, args.db_schema, table), args.repeat)
+    results["handle_simdasi_detail_table"]["http_requests_per_run"] = (stub.request_count - requests_before) / args.repeat
+
+    detail = results["handle_simdasi_detail_table"]["_result"]
+    df_wide = detail["original_df"]
+    results["transpose_if_needed"] = measure(lambda: transpose_if_needed(df_wide, table, args.db_schema), args.repeat)
+    df_long = detail["transposed_df"]
+
+    # Master data: id/28 di-fan-out ke semua kabupaten/kota (id/26 -> id/27 -> id/28)
+    results["process_url_mfd_district"] = measure(lambda: process_url(stub.mfd_url("28")), args.repeat)
+    df_mfd = results["process_url_mfd_district"]["_result"][0]
+
+    if not args.skip_db:
+        DB_CONFIG.update(host=args.db_host, port=str(args.db_port), user=args.db_user,
+                         password=args.db_password, dbname=args.db_name)
+
+        def save(df, name):
+            success, message = save_to_postgres(df, f"{args.db_schema}.{name}")
+            if not success:
+                raise RuntimeError(message)
+
+        results["save_to_postgres_wide"] = measure(lambda: save(df_wide, table), args.repeat)
+        results["save_to_postgres_long"] = measure(lambda: save(df_long, f"{table}_cl"), args.repeat)
+        results["save_to_postgres_mfd_district"] = measure(lambda: save(df_mfd, "bench_mfd_district"), args.repeat)
+
+        # Alternatif: hanya tabel wide yang dikirim, tabel _cl dibangun oleh PostgreSQL
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan = plan_transpose(df_wide, f"{table}_db", args.db_schema)
+
+        def save_with_unpivot():
+            success, message = bulk_load_with_unpivot(df_wide, f"{args.db_schema}.{table}_db", plan)
+            if not success:
+                raise RuntimeError(message)
+
+        if plan is not None:
+            results["bulk_load_with_unpivot"] = measure(save_with_unpivot, args.repeat)
+
+    stub.stop()
+
+    rows = {"wide": len(df_wide), "long": len(df_long), "wide_columns": len(df_wide.columns), "mfd_district": len(df_mfd)}
+    for stats in results.values():
+        stats.pop("_result", None)
+
+    import numpy as np
+    import pandas as pd
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "params": {
+            "regions": args.regions, "variables": args.variables, "years": args.years,
+            "latency_ms": args.latency_ms, "workers": FETCH_CONCURRENCY, "repeat": args.repeat,
+            "seed": args.seed, "db": not args.skip_db,
+        },
+        "rows": rows,
+        "results": results,
+    }
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"bench_{datetime.now():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'Tahap':<36}{'median':>10}{'min':>10}{'max':>10}")
+    for stage, stats in results.items():
+        print(f"{stage:<36}{stats['median_s']:>9.4f}s{stats['min_s']:>9.4f}s{stats['max_s']:>9.4f}s")
+    print(f"\n💾 Hasil ditulis ke {output}")
+
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.threshold, args.min_delta_ms / 1000.0)
+        if regressions:
+            print(f"❌ Regresi terdeteksi: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
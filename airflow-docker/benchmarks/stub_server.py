@@ -0,0 +1,150 @@
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from synthetic_payloads import generate_catalog, generate_detail, generate_mfd, not_available
+
+# Server HTTP lokal yang meniru endpoint SIMDASI id/23, id/25, dan MFD id/26-28.
+# Pakai BPS_API_BASE_URL=http://127.0.0.1:<port>/v1/api/interoperabilitas agar helper memakai stub ini.
+API_PREFIX = "/v1/api/interoperabilitas"
+_CATALOG_RE = re.compile(r"/datasource/simdasi/id/23/wilayah/[^/]+/key/[^/]+/?$")
+_DETAIL_RE = re.compile(r"/datasource/simdasi/id/25/tahun/(\d{4})/id_tabel/([^/]+)/wilayah/[^/]+/key/[^/]+/?$")
+_MFD_RE = re.compile(r"/datasource/simdasi/id/(26|27|28)(?:/parent/([^/]+))?/key/[^/]+/?$")
+
+
+class SimdasiStubServer:
+    """
+    Menjalankan ThreadingHTTPServer di thread latar belakang.
+    latency_ms ditambahkan ke setiap respons untuk meniru waktu tempuh ke API asli.
+    """
+
+    def __init__(self, n_tables: int = 1, n_regions: int = 500, n_variables: int = 20,
+                 years: Optional[list] = None, latency_ms: float = 0.0, seed: int = 0,
+                 mfd_provinces: int = 38, mfd_children: int = 10,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.n_tables = n_tables
+        self.n_regions = n_regions
+        self.n_variables = n_variables
+        self.years = list(years or range(2015, 2025))
+        self.latency_ms = latency_ms
+        self.seed = seed
+        self.mfd_provinces = mfd_provinces
+        self.mfd_children = mfd_children
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def detail_url(self, table_index: int = 0, wilayah: str = "3500000", key: str = "bench") -> str:
+        """URL template id/25 seperti di Google Sheet (tahun apa pun, diganti oleh helper)."""
+        return (f"{self.base_url}/datasource/simdasi/id/25/tahun/{self.years[-1]}"
+                f"/id_tabel/BENCH{table_index:04d}/wilayah/{wilayah}/key/{key}/")
+
+    def mfd_url(self, endpoint_id: str = "28", key: str = "bench") -> str:
+        """URL MFD; id/27 dan id/28 memakai placeholder {parent} untuk fan-out."""
+        parent = "" if endpoint_id == "26" else "/parent/{parent}"
+        return f"{self.base_url}/datasource/simdasi/id/{endpoint_id}{parent}/key/{key}/"
+
+    def _body(self, path: str) -> Optional[bytes]:
+        if not path.startswith(API_PREFIX):
+            return None
+        path = path[len(API_PREFIX):]
+        if _CATALOG_RE.search(path):
+            return _encoded(json.dumps(generate_catalog(self.n_tables, self.years)))
+        match = _DETAIL_RE.search(path)
+        if match:
+            tahun = int(match.group(1))
+            if tahun not in self.years:
+                return _encoded(json.dumps(not_available()))
+            return _detail_body(match.group(2), tahun, self.n_regions, self.n_variables, self.seed)
+        match = _MFD_RE.search(path)
+        if match and (match.group(1) == "26") == (match.group(2) is None):
+            return _encoded(json.dumps(generate_mfd(match.group(1), match.group(2), self.mfd_provinces, self.mfd_children)))
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._count_lock:
+                    server.request_count += 1
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+                body = server._body(self.path.split("?", 1)[0])
+                if body is None:
+                    self.send_response(404)
+                    body = b'{"status": "Error", "message": "not found"}'
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "SimdasiStubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _encoded(text: str) -> bytes:
+    return text.encode("utf-8")
+
+
+@lru_cache(maxsize=256)
+def _detail_body(id_tabel: str, tahun: int, n_regions: int, n_variables: int, seed: int) -> bytes:
+    # Payload dibangkitkan sekali lalu di-cache agar waktu generator tidak ikut terukur
+    return _encoded(json.dumps(generate_detail(tahun, n_regions, n_variables, seed=f"{seed}-{id_tabel}")))
+
+
+if __name__ == "__main__":
+    # python stub_server.py --port 8089 --regions 500 --variables 20 --latency-ms 50
+    parser = argparse.ArgumentParser(description="Server stub SIMDASI lokal untuk benchmark.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--tables", type=int, default=1)
+    parser.add_argument("--regions", type=int, default=500)
+    parser.add_argument("--variables", type=int, default=20)
+    parser.add_argument("--years", type=int, default=10, help="jumlah tahun terakhir yang tersedia")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    last_year = datetime.now().year - 1
+    stub = SimdasiStubServer(n_tables=args.tables, n_regions=args.regions, n_variables=args.variables,
+                             years=range(last_year - args.years + 1, last_year + 1),
+                             latency_ms=args.latency_ms, port=args.port)
+    print(f"🚀 Stub SIMDASI berjalan di {stub.base_url}")
+    print(f"   Contoh URL detail: {stub.detail_url()}")
+    stub.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
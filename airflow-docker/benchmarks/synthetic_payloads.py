@@ -0,0 +1,80 @@
+import random
+from typing import Any, Dict, List, Optional
+
+# Generator payload sintetis SIMDASI (id/23 dan id/25) dengan bentuk yang sama
+# seperti respons webapi.bps.go.id. Hasil deterministik untuk seed yang sama.
+
+
+def table_id(index: int) -> str:
+    return f"BENCH{index:04d}"
+
+
+def generate_catalog(n_tables: int, years: List[int]) -> Dict[str, Any]:
+    """Respons id/23: daftar tabel beserta ketersediaan_tahun."""
+    return {
+        "status": "OK",
+        "data-availability": "available",
+        "data": [
+            {"page": 1, "pages": 1, "total": n_tables},
+            {"data": [
+                {"id_tabel": table_id(i), "judul": f"Tabel Benchmark {i}", "ketersediaan_tahun": list(years)}
+                for i in range(n_tables)
+            ]},
+        ],
+    }
+
+
+def _value_raw(rng: random.Random, missing_ratio: float) -> Any:
+    roll = rng.random()
+    if roll < missing_ratio:
+        return "-"
+    if roll < 0.6:
+        # Format angka Indonesia: titik ribuan, koma desimal
+        integer = f"{rng.randint(0, 9_999_999):,}".replace(",", ".")
+        return integer + rng.choice(["", ",5", ",25"])
+    return round(rng.uniform(0, 1_000_000), 2)
+
+
+def generate_detail(tahun: int, n_regions: int, n_variables: int, seed: str = "0",
+                    missing_ratio: float = 0.02) -> Dict[str, Any]:
+    """Respons id/25 untuk satu tahun: n_regions baris label x n_variables kolom."""
+    rng = random.Random(f"{seed}-{tahun}")
+    kolom = {f"v{i:03d}": {"nama_variabel": f"Variabel <b>{i}</b> (satuan)"} for i in range(n_variables)}
+    rows = []
+    for r in range(n_regions):
+        label = f"<p>Kota Benchmark {r}</p>" if r % 10 == 0 else f"Benchmark {r}"
+        rows.append({
+            "label": label,
+            "variables": {key: {"value_raw": _value_raw(rng, missing_ratio)} for key in kolom},
+        })
+    return {
+        "status": "OK",
+        "data-availability": "available",
+        "data": [
+            {"tahun": tahun},
+            {"lingkup_id": "Kabupaten/Kota", "mms_id": "9001", "kolom": kolom, "data": rows},
+        ],
+    }
+
+
+def generate_mfd(endpoint_id: str, parent: Optional[str], n_provinces: int, n_children: int) -> Dict[str, Any]:
+    """
+    Respons MFD id/26 (provinsi), id/27 (kabupaten/kota per provinsi) dan id/28
+    (kecamatan per kabupaten/kota) dengan kode 7 digit seperti SIMDASI.
+    """
+    if endpoint_id == "26":
+        codes = [f"{p + 11:02d}00000" for p in range(n_provinces)]
+    elif endpoint_id == "27":
+        codes = [f"{parent[:2]}{r + 1:02d}000" for r in range(n_children)]
+    else:
+        codes = [f"{parent[:4]}{d + 1:03d}" for d in range(n_children)]
+    rows = [{"kode_wilayah": code, "nama_wilayah": f"Wilayah {code}", "level": endpoint_id} for code in codes]
+    return {
+        "status": "OK",
+        "data-availability": "available",
+        "data": [{"page": 1, "pages": 1, "total": len(rows)}, {"data": rows}],
+    }
+
+
+def not_available() -> Dict[str, Any]:
+    return {"status": "OK", "data-availability": "not-available"}
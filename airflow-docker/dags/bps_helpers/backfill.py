@@ -0,0 +1,224 @@
+"""
+Backfill tabel SIMDASI di luar scheduler Airflow, paralel dengan beberapa proses.
+
+    python -m bps_helpers.backfill --workers 4                     # dari snapshot sheet
+    python -m bps_helpers.backfill --csv tabel.csv --mode full     # dari CSV (kolom A-E seperti sheet)
+    python -m bps_helpers.backfill --only 'kependudukan.*' --dry-run
+
+Setiap tabel diproses oleh process_simdasi_url (sama dengan task 'process_api').
+Tabel yang selesai dicatat ke file checkpoint JSONL; menjalankan ulang perintah yang
+sama melanjutkan dari tabel yang belum berhasil (--restart untuk mulai dari awal).
+Output tiap tabel ditulis ke log terpisah di folder log.
+"""
+import argparse
+import contextlib
+import fnmatch
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from bps_helpers.config.settings import DATA_DIR, SIMDASI_MAX_PARALLEL, UNPIVOT_MODE, LONG_FORMAT
+from bps_helpers.sheet_config import SNAPSHOT_PATH, load_sheet_snapshot, parse_sheet_csv
+
+CHECKPOINT_PATH = os.path.join(DATA_DIR, "backfill_checkpoint.jsonl")
+LOG_DIR = os.path.join(DATA_DIR, "backfill_logs")
+
+
+def job_key(job: Dict[str, Any]) -> str:
+    return f"{job['schema']}.{job['table']}|{job['url']}"
+
+
+def load_jobs(snapshot_path: str = SNAPSHOT_PATH, csv_path: Optional[str] = None,
+              only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Membaca daftar tabel dari CSV (format sama dengan Google Sheet) atau snapshot sheet.
+    Baris tanpa schema/table dilewati; only = pola glob 'schema.table' yang diproses.
+    """
+    if csv_path:
+        with open(csv_path, "r", encoding="utf-8") as f:
+            records = parse_sheet_csv(f.read())
+    else:
+        snapshot = load_sheet_snapshot(snapshot_path)
+        if not snapshot:
+            raise FileNotFoundError(f"Snapshot sheet tidak ditemukan: {snapshot_path} (jalankan python -m bps_helpers.sheet_config)")
+        records = snapshot.get("records", [])
+
+    jobs, seen = [], set()
+    for record in records:
+        if not record.get("schema") or not record.get("table"):
+            print(f"⚠️ Baris dilewati (schema/table kosong): {record.get('url')}")
+            continue
+        name = f"{record['schema']}.{record['table']}"
+        if only and not any(fnmatch.fnmatchcase(name, pattern) for pattern in only):
+            continue
+        job = {
+            "url": record["url"],
+            "schema": record["schema"],
+            "table": record["table"],
+            "multiply": bool(record.get("multiply_flag", False)),
+            "transform": record.get("transform"),
+        }
+        if job_key(job) in seen:
+            continue
+        seen.add(job_key(job))
+        jobs.append(job)
+    return jobs
+
+
+def completed_keys(checkpoint_path: str) -> Set[str]:
+    """Key tabel yang sudah berhasil menurut checkpoint. Baris terakhir yang rusak (crash saat menulis) diabaikan."""
+    done = set()
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("status") == "ok":
+                    done.add(entry["key"])
+                else:
+                    done.discard(entry.get("key"))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def append_checkpoint(checkpoint_path: str, entry: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    with open(checkpoint_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _run_job(job: Dict[str, Any], options: Dict[str, Any], log_path: str) -> Dict[str, Any]:
+    """Dijalankan di proses worker. Semua print diarahkan ke file log tabel."""
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        print(f"===== {datetime.now().isoformat(timespec='seconds')} {job['schema']}.{job['table']} {options}")
+        try:
+            from bps_helpers.pipeline import process_simdasi_url
+            summary = process_simdasi_url(**job, **options)
+            if not summary.get("success", True):
+                return {"status": "failed", "duration_s": time.perf_counter() - start,
+                        "error": "tidak ada data yang diambil atau penyimpanan gagal (lihat log)", "summary": summary}
+            return {"status": "ok", "duration_s": time.perf_counter() - start, "summary": summary}
+        except Exception as e:
+            traceback.print_exc()
+            return {"status": "failed", "duration_s": time.perf_counter() - start, "error": f"{type(e).__name__}: {e}"}
+
+
+def run_backfill(jobs: List[Dict[str, Any]], options: Dict[str, Any], workers: int = SIMDASI_MAX_PARALLEL,
+                 checkpoint_path: Optional[str] = CHECKPOINT_PATH, log_dir: str = LOG_DIR) -> Dict[str, int]:
+    """
+    Memproses jobs dengan ProcessPoolExecutor. checkpoint_path=None mematikan checkpoint
+    (dipakai untuk dry run). Mengembalikan jumlah tabel per status.
+    """
+    done = completed_keys(checkpoint_path) if checkpoint_path else set()
+    pending = [job for job in jobs if job_key(job) not in done]
+    counts = {"ok": 0, "failed": 0, "skipped": len(jobs) - len(pending)}
+    if counts["skipped"]:
+        print(f"⏭️ {counts['skipped']} tabel sudah selesai menurut checkpoint {checkpoint_path}.")
+    if not pending:
+        print("✅ Tidak ada tabel yang perlu diproses.")
+        return counts
+
+    print(f"🚀 Backfill {len(pending)} tabel dengan {workers} proses (log: {log_dir}).")
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = {
+            executor.submit(_run_job, job, options, os.path.join(log_dir, f"{job['schema']}.{job['table']}.log")): job
+            for job in pending
+        }
+        for finished, future in enumerate(as_completed(futures), start=1):
+            job = futures[future]
+            name = f"{job['schema']}.{job['table']}"
+            try:
+                outcome = future.result()
+            except Exception as e:
+                # Proses worker mati (mis. kehabisan memori)
+                outcome = {"status": "failed", "duration_s": None, "error": f"{type(e).__name__}: {e}"}
+            counts[outcome["status"]] += 1
+
+            if checkpoint_path:
+                append_checkpoint(checkpoint_path, {
+                    "key": job_key(job),
+                    "table": name,
+                    "finished_at": datetime.now().isoformat(timespec="seconds"),
+                    **outcome,
+                })
+
+            elapsed = time.perf_counter() - start
+            eta = elapsed / finished * (len(pending) - finished)
+            duration = f"{outcome['duration_s']:.1f}s" if outcome.get("duration_s") is not None else "-"
+            if outcome["status"] == "ok":
+                print(f"[{finished}/{len(pending)}] ✅ {name} ({duration}) | berjalan {elapsed:.0f}s, sisa ±{eta:.0f}s")
+            else:
+                print(f"[{finished}/{len(pending)}] ❌ {name} ({duration}): {outcome['error']} | berjalan {elapsed:.0f}s, sisa ±{eta:.0f}s")
+    except KeyboardInterrupt:
+        print("🛑 Dihentikan. Jalankan ulang perintah yang sama untuk melanjutkan dari checkpoint.")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    print(f"🏁 Selesai dalam {time.perf_counter() - start:.1f}s: {counts['ok']} berhasil, "
+          f"{counts['failed']} gagal, {counts['skipped']} dilewati.")
+    return counts
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bps_helpers.backfill",
+                                     description="Backfill tabel SIMDASI secara paralel di luar Airflow.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--snapshot", default=SNAPSHOT_PATH, help="snapshot sheet JSON (default: snapshot DAG)")
+    source.add_argument("--csv", default=None, help="CSV dengan kolom url, schema, table, multiply (X), transform")
+    parser.add_argument("--only", nargs="*", default=None, help="pola glob 'schema.table' yang diproses")
+    parser.add_argument("--workers", type=int, default=SIMDASI_MAX_PARALLEL, help="jumlah proses paralel")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="full")
+    parser.add_argument("--unpivot", choices=["pandas", "database"], default=UNPIVOT_MODE)
+    parser.add_argument("--long-format", choices=["table", "normalized"], default=LONG_FORMAT)
+    parser.add_argument("--replay", action="store_true", help="bangun ulang dari arsip respons lokal")
+    parser.add_argument("--dry-run", action="store_true", help="ambil dan parse saja, tanpa menulis ke database")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="file checkpoint JSONL")
+    parser.add_argument("--restart", action="store_true", help="abaikan checkpoint lama dan mulai dari awal")
+    parser.add_argument("--log-dir", default=LOG_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        jobs = load_jobs(args.snapshot, args.csv, args.only)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 2
+    if not jobs:
+        print("⚠️ Tidak ada tabel yang cocok.")
+        return 0
+
+    options = {
+        "mode": args.mode,
+        "replay": args.replay,
+        "unpivot": args.unpivot,
+        "long_format": args.long_format,
+        "dry_run": args.dry_run,
+    }
+    checkpoint_path = None if args.dry_run else args.checkpoint
+    if checkpoint_path and args.restart and os.path.exists(checkpoint_path):
+        os.replace(checkpoint_path, f"{checkpoint_path}.{int(time.time())}.bak")
+        print("♻️ Checkpoint lama dipindahkan, mulai dari awal.")
+
+    counts = run_backfill(jobs, options, workers=args.workers, checkpoint_path=checkpoint_path, log_dir=args.log_dir)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
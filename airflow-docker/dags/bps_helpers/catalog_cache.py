@@ -0,0 +1,175 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, List, Tuple
+import requests
+from bps_helpers.config.settings import API_BASE_URL, DATA_DIR, CATALOG_CACHE_TTL, CATALOG_CACHE_MAX_ENTRIES
+from bps_helpers.file_utils import atomic_write
+from bps_helpers.response_archive import fetch_json
+
+CATALOG_URL = API_BASE_URL + "/datasource/simdasi/id/23/wilayah/{wilayah}/key/{key}/"
+CATALOG_CACHE_DIR = os.path.join(DATA_DIR, "catalog_cache")
+
+# Index in-process: (wilayah, key) -> (waktu_ambil, {id_tabel: [tahun, ...]})
+_index: Dict[Tuple[str, str], Tuple[float, Dict[str, List[int]]]] = {}
+_index_lock = threading.Lock()
+_key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+
+def _cache_path(wilayah: str, key: str) -> str:
+    """Nama file cache memakai hash dari key supaya API key tidak tertulis di disk."""
+    key_hash = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CATALOG_CACHE_DIR, f"catalog_{wilayah}_{key_hash}.json")
+
+
+def _lock_for(cache_key: Tuple[str, str]) -> threading.Lock:
+    with _index_lock:
+        return _key_locks.setdefault(cache_key, threading.Lock())
+
+
+@contextlib.contextmanager
+def _disk_lock(path: str):
+    """
+    Kunci file (flock) per (wilayah, key) di samping file cache, supaya task Airflow /
+    proses backfill yang berjalan bersamaan tidak mengunduh katalog yang sama.
+    """
+    os.makedirs(CATALOG_CACHE_DIR, exist_ok=True)
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _build_index(list_data: dict) -> Dict[str, List[int]]:
+    """Mengubah respons id/23 menjadi mapping id_tabel -> tahun yang tersedia."""
+    index = {}
+    for table_info in list_data.get('data', [{}, {}])[1].get('data', []):
+        id_tabel = table_info.get('id_tabel')
+        years = table_info.get('ketersediaan_tahun')
+        if id_tabel and years and id_tabel not in index:
+            index[id_tabel] = years
+    return index
+
+
+def _download_catalog(wilayah: str, key: str) -> Optional[Dict[str, List[int]]]:
+    list_url = CATALOG_URL.format(wilayah=wilayah, key=key)
+    print(f"🌐 Mengunduh katalog tabel SIMDASI untuk wilayah {wilayah}...")
+    status_code, list_data = fetch_json(list_url)
+    if status_code != 200:
+        print("⚠️ Gagal menghubungi endpoint daftar tabel.")
+        return None
+
+    if list_data.get("data-availability") != "available":
+        print("⚠️ Daftar tabel tidak tersedia untuk wilayah ini.")
+        return None
+
+    return _build_index(list_data)
+
+
+def _read_disk(path: str) -> Optional[Tuple[float, Dict[str, List[int]]]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        fetched_at = float(cached["fetched_at"])
+        if time.time() - fetched_at > CATALOG_CACHE_TTL:
+            return None
+        return fetched_at, cached["index"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_disk(path: str, fetched_at: float, index: Dict[str, List[int]]) -> None:
+    try:
+        atomic_write(path, json.dumps({"fetched_at": fetched_at, "index": index}))
+        _evict_disk()
+    except OSError as e:
+        print(f"⚠️ Gagal menulis cache katalog ke disk: {e}")
+
+
+def _evict_disk() -> None:
+    """Hapus file cache yang kedaluwarsa, lalu batasi jumlah file ke CATALOG_CACHE_MAX_ENTRIES."""
+    now = time.time()
+    entries = []
+    for name in os.listdir(CATALOG_CACHE_DIR):
+        if not (name.startswith("catalog_") and name.endswith(".json")):
+            continue
+        path = os.path.join(CATALOG_CACHE_DIR, name)
+        try:
+            mtime = os.path.getmtime(path)
+            if now - mtime > CATALOG_CACHE_TTL:
+                os.remove(path)
+            else:
+                entries.append((mtime, path))
+        except OSError:
+            continue
+
+    entries.sort(reverse=True)
+    for _, path in entries[CATALOG_CACHE_MAX_ENTRIES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_catalog_index(wilayah: str, key: str, force_refresh: bool = False) -> Optional[Dict[str, List[int]]]:
+    """
+    Mengembalikan mapping id_tabel -> ketersediaan_tahun untuk satu (wilayah, key).
+    Urutan pencarian: index in-process, lalu cache di disk (dengan TTL), lalu API
+    (di bawah kunci file, jadi satu unduhan per wilayah untuk semua proses).
+    force_refresh=True selalu mengunduh ulang katalog dari API.
+    """
+    cache_key = (wilayah, key)
+    path = _cache_path(wilayah, key)
+
+    with _lock_for(cache_key):
+        if not force_refresh:
+            cached = _index.get(cache_key)
+            if cached and time.time() - cached[0] <= CATALOG_CACHE_TTL:
+                return cached[1]
+
+            cached = _read_disk(path)
+            if cached:
+                print(f"📦 Katalog wilayah {wilayah} diambil dari cache disk.")
+                _index[cache_key] = cached
+                return cached[1]
+
+        with _disk_lock(path):
+            # Dicek ulang: proses lain mungkin baru selesai mengunduh selagi kita menunggu kunci
+            cached = None if force_refresh else _read_disk(path)
+            if cached:
+                print(f"📦 Katalog wilayah {wilayah} diambil dari cache disk.")
+                _index[cache_key] = cached
+                return cached[1]
+
+            try:
+                index = _download_catalog(wilayah, key)
+            except (requests.exceptions.RequestException, ValueError, IndexError, AttributeError, TypeError) as e:
+                print(f"❌ Gagal mengunduh katalog tabel: {e}")
+                return None
+
+            if index is None:
+                return None
+
+            fetched_at = time.time()
+            _index[cache_key] = (fetched_at, index)
+            _write_disk(path, fetched_at, index)
+            return index
+
+
+def clear_catalog_cache() -> None:
+    """Kosongkan index in-process dan semua file cache katalog di disk."""
+    with _index_lock:
+        _index.clear()
+    if os.path.isdir(CATALOG_CACHE_DIR):
+        for name in os.listdir(CATALOG_CACHE_DIR):
+            if name.startswith("catalog_"):
+                try:
+                    os.remove(os.path.join(CATALOG_CACHE_DIR, name))
+                except OSError:
+                    pass
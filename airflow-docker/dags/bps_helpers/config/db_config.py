@@ -1,4 +1,8 @@
-import psycopg2
+import os
+import threading
+from contextlib import contextmanager
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL
 DB_CONFIG = {
     "dbname": "postgres",
     "user": "postgres",
@@ -7,16 +11,83 @@ DB_CONFIG = {
     "port": "5431"
 }
 
+# Pengaturan pool koneksi bersama (satu engine per proses)
+DB_POOL_SIZE = int(os.getenv("BPS_DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("BPS_DB_MAX_OVERFLOW", "5"))
+DB_POOL_RECYCLE = int(os.getenv("BPS_DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("BPS_DB_POOL_PRE_PING", "true").lower() == "true"
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+_ensured_schemas = set()
+
+
+def get_engine():
+    """
+    Mengembalikan engine SQLAlchemy bersama yang dibuat sekali per proses
+    (lazy), dengan pool berukuran DB_POOL_SIZE dan pre-ping sebelum dipakai.
+    Jika proses di-fork, engine dibuat ulang agar koneksi tidak dipakai bersama.
+    """
+    global _engine, _engine_pid
+    if _engine is None or _engine_pid != os.getpid():
+        with _engine_lock:
+            if _engine is None or _engine_pid != os.getpid():
+                url = URL.create(
+                    "postgresql+psycopg2",
+                    username=DB_CONFIG["user"],
+                    password=DB_CONFIG["password"],
+                    host=DB_CONFIG["host"],
+                    port=int(DB_CONFIG["port"]),
+                    database=DB_CONFIG["dbname"],
+                )
+                _engine = create_engine(
+                    url,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_recycle=DB_POOL_RECYCLE,
+                    pool_pre_ping=DB_POOL_PRE_PING,
+                )
+                _engine_pid = os.getpid()
+                _ensured_schemas.clear()
+    return _engine
+
+
 def get_db_connection():
     """
-    Membuat dan mengembalikan sebuah koneksi baru ke database.
-    Fungsi ini akan dipanggil oleh setiap file processor yang membutuhkan
-    akses ke database.
+    Mengambil koneksi DBAPI (psycopg2) dari pool bersama.
+    Panggil conn.close() untuk mengembalikannya ke pool.
     """
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        print("✅ Koneksi database berhasil dibuat.")
-        return conn
+        return get_engine().raw_connection()
     except Exception as e:
         print(f"❌ Gagal menyambung ke database: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+
+@contextmanager
+def db_cursor():
+    """Cursor dari koneksi pool dalam satu transaksi: commit jika sukses, rollback jika gagal."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def ensure_schema(schema_name: str) -> None:
+    """CREATE SCHEMA IF NOT EXISTS, hanya sekali per skema per proses."""
+    if schema_name in _ensured_schemas:
+        return
+    with get_engine().begin() as conn:
+        # IF NOT EXISTS tidak aman jika beberapa proses membuat skema yang sama bersamaan
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"schema:{schema_name}"})
+        quoted = schema_name.replace('"', '""')
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{quoted}"'))
+    _ensured_schemas.add(schema_name)
+    print(f"✅ Skema '{schema_name}' siap.")
@@ -0,0 +1,74 @@
+import os
+
+# Pengaturan runtime untuk helper SIMDASI.
+# Semua nilai bisa di-override lewat environment variable di docker-compose / .env.
+
+# Jumlah maksimum request tahun yang berjalan bersamaan per tabel.
+# Isi 1 untuk kembali ke mode serial (satu per satu).
+FETCH_CONCURRENCY = int(os.getenv("BPS_FETCH_CONCURRENCY", "6"))
+
+# Timeout (detik) untuk setiap request ke webapi.bps.go.id
+HTTP_TIMEOUT = int(os.getenv("BPS_HTTP_TIMEOUT", "30"))
+
+# Ukuran pool koneksi keep-alive per host untuk session HTTP bersama
+HTTP_POOL_MAXSIZE = int(os.getenv("BPS_HTTP_POOL_MAXSIZE", "10"))
+
+# Base URL Web API BPS (bisa diarahkan ke server stub lokal untuk benchmark)
+API_BASE_URL = os.getenv("BPS_API_BASE_URL", "https://webapi.bps.go.id/v1/api/interoperabilitas").rstrip("/")
+
+# Direktori data lokal (cache, snapshot, arsip). Di docker-compose dipetakan ke ./data
+DATA_DIR = os.getenv(
+    "BPS_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), "data"),
+)
+
+# Cache katalog tabel SIMDASI (endpoint id/23) per (wilayah, key)
+CATALOG_CACHE_TTL = int(os.getenv("BPS_CATALOG_CACHE_TTL", str(6 * 60 * 60)))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("BPS_CATALOG_CACHE_MAX_ENTRIES", "64"))
+
+# Google Sheet berisi daftar URL API (kolom A-E) yang diproses oleh DAG
+SHEET_CSV_URL = os.getenv(
+    "BPS_SHEET_CSV_URL",
+    "https://docs.google.com/spreadsheets/d/1hJ02dmxIVXZd7_i0ue3SvurxKNUPDvpKQqT5PSmJ_2g/gviz/tq?tqx=out:csv&gid=1551122677",
+)
+
+# Umur maksimum (detik) snapshot sheet lokal sebelum dicek ulang ke Google Sheets
+SHEET_SNAPSHOT_TTL = int(os.getenv("BPS_SHEET_SNAPSHOT_TTL", str(60 * 60)))
+
+# Airflow pool yang membatasi jumlah task process_api yang berjalan bersamaan
+# (dibuat oleh airflow-init di docker-compose), plus batas per DAG run.
+SIMDASI_POOL = os.getenv("BPS_SIMDASI_POOL", "bps_simdasi")
+SIMDASI_MAX_PARALLEL = int(os.getenv("BPS_SIMDASI_MAX_PARALLEL", "4"))
+
+# Arsip respons mentah API (JSON terkompresi gzip) di DATA_DIR/archive.
+# BPS_REPLAY_MODE=true membaca respons hanya dari arsip, tanpa akses jaringan.
+ARCHIVE_DIR = os.getenv("BPS_ARCHIVE_DIR", os.path.join(DATA_DIR, "archive"))
+ARCHIVE_ENABLED = os.getenv("BPS_ARCHIVE_ENABLED", "true").lower() == "true"
+REPLAY_MODE = os.getenv("BPS_REPLAY_MODE", "false").lower() == "true"
+
+# Metrik StatsD (UDP) per tahap process_simdasi_url. Host kosong = tidak dikirim,
+# ringkasan per task tetap dicetak dan dikembalikan ke XCom.
+STATSD_HOST = os.getenv("BPS_STATSD_HOST", "")
+STATSD_PORT = int(os.getenv("BPS_STATSD_PORT", "8125"))
+STATSD_PREFIX = os.getenv("BPS_STATSD_PREFIX", "bps_simdasi")
+
+# Cache negatif (tabel, wilayah, tahun) yang dinyatakan "not available" oleh API
+NEGATIVE_CACHE_TTL = int(os.getenv("BPS_NEGATIVE_CACHE_TTL", str(7 * 24 * 60 * 60)))
+
+# Retry request HTTP (error jaringan, timeout, 429, 5xx) dengan exponential backoff + jitter
+HTTP_MAX_RETRIES = int(os.getenv("BPS_HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("BPS_HTTP_BACKOFF_BASE", "1.0"))
+HTTP_BACKOFF_MAX = float(os.getenv("BPS_HTTP_BACKOFF_MAX", "30.0"))
+
+# Circuit breaker per host: terbuka setelah N kegagalan berturut-turut,
+# request ke host itu langsung gagal sampai CIRCUIT_RESET_TIMEOUT detik berlalu.
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("BPS_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = int(os.getenv("BPS_CIRCUIT_RESET_TIMEOUT", "300"))
+
+# Cara membangun tabel long {table}_cl: 'pandas' (melt lalu COPY kedua) atau
+# 'database' (hanya tabel wide yang dikirim, unpivot dilakukan PostgreSQL dalam transaksi yang sama)
+UNPIVOT_MODE = os.getenv("BPS_UNPIVOT_MODE", "pandas")
+
+# Bentuk output long: 'table' (tabel {table}_cl seperti biasa) atau 'normalized'
+# (dimensi {table}_cl_kategori / _cl_wilayah + fakta {table}_cl_fakta, dan view {table}_cl)
+LONG_FORMAT = os.getenv("BPS_LONG_FORMAT", "table")
@@ -0,0 +1,30 @@
+import os
+import re
+import threading
+
+# Karakter yang tidak aman untuk nama file cache/arsip di DATA_DIR (diganti '_')
+_UNSAFE_CHARS_RE = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def atomic_write(path: str, data, opener=open) -> None:
+    """
+    Menulis data (str atau bytes) ke path lewat file tmp per proses/thread lalu os.replace,
+    sehingga pembaca tidak pernah melihat file setengah jadi. OSError diteruskan ke pemanggil.
+    opener bisa diganti, mis. gzip.open untuk arsip terkompresi.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if isinstance(data, bytes):
+        mode, kwargs = "wb", {}
+    else:
+        mode, kwargs = "wt", {"encoding": "utf-8"}
+    try:
+        with opener(tmp_path, mode, **kwargs) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -1,13 +1,47 @@
 import requests
 import pandas as pd
+import numpy as np
 import re
 from urllib.parse import urlparse
 import json
+import hashlib
+import resource
+import time
+import contextvars
 from datetime import datetime
-from typing import Optional, List, Dict, Any                  
-
-def get_available_years(base_url: str) -> Optional[List[int]]:
-    """Automatically try to fetch available years for a table from endpoint id/23."""
+from typing import Optional, List, Dict, Any, Callable                  
+from concurrent.futures import ThreadPoolExecutor
+from bps_helpers.config.settings import FETCH_CONCURRENCY, API_BASE_URL
+from bps_helpers.response_archive import fetch_json
+from bps_helpers.http_client import CircuitOpenError
+from bps_helpers.metrics import stage, timing, gauge, incr
+from bps_helpers.negative_cache import unavailable_years, mark_unavailable, mark_available
+from bps_helpers.catalog_cache import get_catalog_index
+
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_INVALID_COLUMN_CHARS_RE = re.compile(r'[^a-z0-9\s_]')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Jenis value_raw: 1 = angka (int/float/bool), 2 = string, lainnya 0
+_VALUE_KINDS = {int: 1, float: 1, bool: 1, str: 2}
+
+# Endpoint daftar SIMDASI -> nama tabel default
+SIMDASI_LIST_TABLES = {'26': "mfd_provinsi", '27': "mfd_regency", '28': "mfd_district", '22': "simdasi_subjects", '34': "simdasi_master_table", '36': "simdasi_master_table_detail", '23': "simdasi_tables_by_area", '24': "simdasi_tables_by_area_subject"}
+MFD_PROVINCE_URL = API_BASE_URL + "/datasource/simdasi/id/26/key/{key}/"
+MFD_REGENCY_URL = API_BASE_URL + "/datasource/simdasi/id/27/parent/{{parent}}/key/{key}/"
+# Kolom kode wilayah di respons MFD, urut prioritas (setelah normalize_column_name).
+# Kabupaten/kota didahulukan karena baris id/27 juga memuat kode provinsi induknya.
+MFD_CODE_COLUMNS = ("kode_wilayah", "kode_bps", "kode_mfd", "kode_kabupaten_kota", "kode_kab_kota",
+                    "kode_kabupaten", "kode_provinsi", "kode")
+# Placeholder fan-out di URL daftar dan nama kolom asal kodenya
+_FAN_OUT_RE = re.compile(r'\{(parent|wilayah)\}', re.IGNORECASE)
+_FAN_OUT_COLUMNS = {'parent': "kode_induk", 'wilayah': "wilayah_sumber"}
+
+def get_available_years(base_url: str, force_refresh: bool = False) -> Optional[List[int]]:
+    """
+    Automatically try to fetch available years for a table from endpoint id/23.
+    Katalog id/23 di-cache per (wilayah, key) lewat catalog_cache, sehingga satu run
+    cukup mengunduh katalog sekali per wilayah. force_refresh=True mengabaikan cache.
+    """
     print("\n🔄 Mencoba mengambil daftar tahun yang tersedia secara otomatis...")
     try:
         id_tabel_match = re.search(r'id_tabel/([^/]+)', base_url)
@@ -22,24 +56,15 @@ def get_available_years(base_url: str) -> Optional[List[int]]:
         wilayah = wilayah_match.group(1)
         key = key_match.group(1)
 
-        list_url = f"https://webapi.bps.go.id/v1/api/interoperabilitas/datasource/simdasi/id/23/wilayah/{wilayah}/key/{key}/"
-
-        response = requests.get(list_url, timeout=30)
-        if response.status_code != 200:
-            print("⚠️ Gagal menghubungi endpoint daftar tabel.")
+        with stage("catalog_lookup"):
+            catalog = get_catalog_index(wilayah, key, force_refresh=force_refresh)
+        if catalog is None:
             return None
 
-        list_data = response.json()
-        if list_data.get("data-availability") != "available":
-            print("⚠️ Daftar tabel tidak tersedia untuk wilayah ini.")
-            return None
-
-        for table_info in list_data.get('data', [{}, {}])[1].get('data', []):
-            if table_info.get('id_tabel') == id_tabel:
-                years = table_info.get('ketersediaan_tahun')
-                if years:
-                    print(f"✅ Tahun yang tersedia ditemukan: {years}")
-                    return sorted(years, reverse=True)
+        years = catalog.get(id_tabel)
+        if years:
+            print(f"✅ Tahun yang tersedia ditemukan: {years}")
+            return sorted(years, reverse=True)
 
         print("⚠️ Tabel tidak ditemukan dalam daftar, tidak bisa menentukan tahun.")
         return None
@@ -47,19 +72,204 @@ def get_available_years(base_url: str) -> Optional[List[int]]:
         print(f"❌ Terjadi kesalahan saat mengambil tahun otomatis: {e}")
         return None
     
-def handle_simdasi_list(json_data):
+def simdasi_endpoint_id(url: str) -> Optional[str]:
+    """Nomor endpoint SIMDASI dari URL ('25' untuk '/id/25/'), None jika tidak ada."""
+    match = re.search(r'/id/(\d+)/', url)
+    return match.group(1) if match else None
+
+
+def list_records(json_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Baris dari respons daftar SIMDASI: {'data': [{page, pages, total}, {'data': [...]}]}."""
+    data = json_data['data']
+    block = data[1] if isinstance(data, list) and len(data) > 1 else data
+    rows = block['data'] if isinstance(block, dict) else block
+    if not isinstance(rows, list):
+        raise TypeError(f"data daftar bertipe {type(rows).__name__}, bukan list")
+    return rows
+
+
+def _page_count(json_data: Dict[str, Any]) -> int:
+    try:
+        return int(json_data['data'][0].get('pages') or 1)
+    except (KeyError, IndexError, TypeError, AttributeError, ValueError):
+        return 1
+
+
+def fetch_list_rows(url: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Mengambil semua halaman satu URL daftar SIMDASI. None jika gagal,
+    list kosong jika API menyatakan data tidak tersedia.
+    """
+    rows = []
+    page, pages = 1, 1
+    while page <= pages:
+        page_url = url if page == 1 else re.sub(r'/key/', f'/page/{page}/key/', url, count=1)
+        try:
+            with stage("fetch_page"):
+                status_code, json_data = fetch_json(page_url)
+            if status_code != 200:
+                print(f"❌ Kesalahan HTTP {status_code}: {page_url}")
+                return None
+            if json_data.get("status") != "OK":
+                print(f"❌ Kesalahan API: {json_data.get('message', 'Kesalahan tidak diketahui')} ({page_url})")
+                return None
+            if json_data.get("data-availability", "available") != "available":
+                return rows
+            rows.extend(list_records(json_data))
+        except CircuitOpenError:
+            raise
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Kesalahan jaringan: {e} ({page_url})")
+            return None
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print(f"❌ Tidak dapat mengurai struktur daftar SIMDASI. Kesalahan: {e}")
+            return None
+        if page == 1:
+            pages = _page_count(json_data)
+        page += 1
+    return rows
+
+
+def fetch_list_fan_out(url_template: str, placeholder: str, codes: List[str],
+                       max_workers: Optional[int] = None) -> List[tuple]:
+    """
+    Mengganti {placeholder} di URL dengan setiap kode lalu mengambil semuanya
+    secara bersamaan (worker pool terbatas). Mengembalikan [(kode, rows)] urut
+    sesuai codes; kode yang gagal diambil dilewati.
+    """
+    pattern = re.compile(r'\{' + placeholder + r'\}', re.IGNORECASE)
+    workers = max(1, min(max_workers or FETCH_CONCURRENCY, len(codes) or 1))
+    print(f"🔄 Mengambil {len(codes)} URL {{{placeholder}}} dengan {workers} worker...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, fetch_list_rows, pattern.sub(code, url_template))
+            for code in codes
+        ]
+        results = [(code, future.result()) for code, future in zip(codes, futures)]
+
+    failed = [code for code, rows in results if rows is None]
+    if failed:
+        print(f"⚠️ {len(failed)} URL gagal diambil: {failed[:10]}{' ...' if len(failed) > 10 else ''}")
+        incr("list_fetch_failed", len(failed))
+    return [(code, rows) for code, rows in results if rows is not None]
+
+
+def mfd_codes(rows: List[Dict[str, Any]]) -> List[str]:
+    """Kode wilayah dari baris MFD (kolom pertama yang cocok dengan MFD_CODE_COLUMNS)."""
+    if not rows:
+        return []
+    names = {normalize_column_name(col): col for col in rows[0]}
+    fallback = [col for norm, col in names.items() if norm.startswith('kode')]
+    column = next((names[c] for c in MFD_CODE_COLUMNS if c in names), fallback[-1] if fallback else None)
+    if column is None:
+        raise ValueError(f"Kolom kode wilayah tidak ditemukan di respons MFD: {list(rows[0])}")
+    return [str(row[column]) for row in rows if row.get(column) not in (None, "")]
+
+
+def _fan_out_codes(endpoint_id: str, placeholder: str, key: str, max_workers: Optional[int] = None) -> List[str]:
+    """
+    Kode untuk placeholder fan-out:
+    {parent} di id/27 -> semua provinsi, {parent} di id/28 -> semua kabupaten/kota,
+    {wilayah} -> semua provinsi dan kabupaten/kota.
+    """
+    with stage("fetch_mfd"):
+        provinces = fetch_list_rows(MFD_PROVINCE_URL.format(key=key))
+        if provinces is None:
+            raise ValueError("Daftar provinsi (MFD id/26) tidak bisa diambil.")
+        province_codes = mfd_codes(provinces)
+        if placeholder == 'parent' and endpoint_id == '27':
+            return province_codes
+        regency_groups = fetch_list_fan_out(MFD_REGENCY_URL.format(key=key), 'parent', province_codes, max_workers)
+        regency_codes = [code for _, rows in regency_groups for code in mfd_codes(rows)]
+    print(f"🗺️ MFD: {len(province_codes)} provinsi, {len(regency_codes)} kabupaten/kota.")
+    if placeholder == 'parent':
+        return regency_codes
+    return province_codes + regency_codes
+
+
+def _list_column(values: list) -> pd.Series:
+    """Kolom integer yang punya nilai kosong tetap integer (Int64), bukan float."""
+    series = pd.Series(values)
+    if series.dtype.kind in 'fO' and series.isna().any():
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+            return pd.Series(values, dtype="Int64")
+    return series
+
+
+def build_list_frame(groups: List[tuple], source_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    Menyusun DataFrame dari [(kode, rows)] dalam satu lintasan kolom-per-kolom:
+    setiap nilai langsung masuk ke list kolomnya (tanpa DataFrame per respons + concat).
+    source_column (jika ada) berisi kode fan-out asal setiap baris. Nama kolom
+    dinormalisasi sekali per nama mentah; nilai bersarang (list/dict) disimpan sebagai teks JSON.
+    """
+    columns: Dict[str, list] = {source_column: []} if source_column else {}
+    names: Dict[str, str] = {}
+    n_rows = 0
+    for code, rows in groups:
+        for row in rows:
+            values = {}
+            for raw_col, value in row.items():
+                col = names.get(raw_col)
+                if col is None:
+                    col = names[raw_col] = normalize_column_name(str(raw_col))
+                if isinstance(value, (list, dict)):
+                    value = json.dumps(value, ensure_ascii=False)
+                values[col] = value
+                if col not in columns:
+                    columns[col] = [None] * n_rows
+            if source_column:
+                values[source_column] = code
+            for col, column in columns.items():
+                column.append(values.get(col))
+            n_rows += 1
+
+    return pd.DataFrame({col: _list_column(values) for col, values in columns.items()})
+
+
+def handle_simdasi_list(json_data: Dict[str, Any], table_name: Optional[str] = None) -> pd.DataFrame:
     """Menangani respons API SIMDASI berbasis daftar sederhana."""
     try:
-        data_list = json_data['data'][1]['data']
-        df = pd.DataFrame(data_list)
-        df.columns = [normalize_column_name(col) for col in df.columns]
-        return df
+        return build_list_frame([(None, list_records(json_data))])
     except (KeyError, IndexError, TypeError) as e:
-        print(f"❌ Tidak dapat mengurai struktur daftar SIMDASI. Kesalahan: {e}")
-        return pd.DataFrame(), None
-        
-def process_url(url):
-    """Menganalisis URL, mengambil data, dan memanggil penangan yang sesuai."""
+        print(f"❌ Tidak dapat mengurai struktur daftar SIMDASI{f' ({table_name})' if table_name else ''}. Kesalahan: {e}")
+        return pd.DataFrame()
+
+
+def handle_simdasi_list_url(url: str, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Mengambil endpoint daftar SIMDASI (id/22, 23, 24, 26, 27, 28, 34, 36) menjadi satu DataFrame.
+    URL boleh berisi placeholder {parent} atau {wilayah} (lihat _fan_out_codes); semua
+    variasinya diambil bersamaan dan digabung dengan kolom asal kode_induk / wilayah_sumber.
+    """
+    fan_out = _FAN_OUT_RE.search(url)
+    if not fan_out:
+        rows = fetch_list_rows(url)
+        if rows is None:
+            return pd.DataFrame()
+        with stage("parse"):
+            return build_list_frame([(None, rows)])
+
+    placeholder = fan_out.group(1).lower()
+    key_match = re.search(r'key/([^/]+)', url)
+    if not key_match:
+        print("⚠️ URL tidak mengandung key yang diperlukan untuk mengambil daftar wilayah.")
+        return pd.DataFrame()
+    codes = _fan_out_codes(simdasi_endpoint_id(url), placeholder, key_match.group(1), max_workers)
+    with stage("fetch"):
+        groups = fetch_list_fan_out(url, placeholder, codes, max_workers)
+    gauge("list_sources", len(groups))
+    with stage("parse"):
+        return build_list_frame(groups, source_column=_FAN_OUT_COLUMNS[placeholder])
+
+
+def process_url(url: str, schema: str = "simdasi", table: Optional[str] = None,
+                max_workers: Optional[int] = None) -> tuple:
+    """
+    Menganalisis URL, mengambil data, dan memanggil penangan yang sesuai.
+    Mengembalikan (DataFrame, nama tabel); untuk /id/25/ DataFrame-nya berbentuk wide.
+    """
     # Ganti placeholder {tahun} dengan tahun sekarang untuk validasi awal
     url_for_check = re.sub(r'\{tahun\}', str(datetime.now().year), url, flags=re.IGNORECASE)
 
@@ -68,60 +278,287 @@ def process_url(url):
 
     if '/datasource/simdasi/' in path:
         print("== Terdeteksi API SIMDASI ==")
-        match = re.search(r'/id/(\d+)/', url_for_check)
-        if not match:
+        endpoint_id = simdasi_endpoint_id(url_for_check)
+        if not endpoint_id:
             print("❌ URL SIMDASI tidak valid. Tidak dapat menemukan ID endpoint (contoh: '/id/25/').")
             return pd.DataFrame(), None
 
-        endpoint_id = match.group(1)
-
         if endpoint_id == '25':
-            # Kirim URL asli dengan placeholder {tahun} ke penangan
-            return handle_simdasi_detail_table(url)
-        else:
-            try:
-                response = requests.get(url_for_check, timeout=30)
-                if response.status_code != 200:
-                    print(f"❌ Kesalahan HTTP: {response.status_code} - {response.text}")
-                    return pd.DataFrame(), None
-                json_data = response.json()
-                if json_data.get("status") != "OK":
-                    print(f"❌ Kesalahan API: {json_data.get('message', 'Kesalahan tidak diketahui')}")
-                    return pd.DataFrame(), None
-            except Exception as e:
-                print(f"❌ Gagal mengambil data untuk URL list: {e}")
-                return pd.DataFrame(), None
-
-            simdasi_map = {'26': "mfd_provinsi", '27': "mfd_regency", '28': "mfd_district", '22': "simdasi_subjects", '34': "simdasi_master_table", '36': "simdasi_master_table_detail", '23': "simdasi_tables_by_area", '24': "simdasi_tables_by_area_subject"}
-            table_name = simdasi_map.get(endpoint_id, f"unknown_simdasi_{endpoint_id}")
-            return handle_simdasi_list(json_data, table_name)
+            id_tabel = re.search(r'id_tabel/([^/]+)', url_for_check)
+            table = table or f"simdasi_tabel_{id_tabel.group(1) if id_tabel else 'unknown'}"
+            # Helper mengganti segmen tahun/NNNN untuk setiap tahun yang tersedia
+            result = handle_simdasi_detail_table(url_for_check, schema, table, max_workers=max_workers)
+            return (result["original_df"] if result else pd.DataFrame()), table
+
+        table = table or SIMDASI_LIST_TABLES.get(endpoint_id, f"unknown_simdasi_{endpoint_id}")
+        try:
+            return handle_simdasi_list_url(url_for_check, max_workers=max_workers), table
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"❌ Gagal mengambil data untuk URL list: {e}")
+            return pd.DataFrame(), None
 
     else:
         print("❌ Format URL API tidak dikenali. Skrip ini hanya menangani URL SIMDASI.")
         return pd.DataFrame(), None    
-def handle_simdasi_detail_table(url_template: str, schema: str, table: str) -> Dict[str, Any]:
-    """Handle complex structure from 'Detail of SIMDASI Table' endpoint (/id/25/)."""
+
+
+def _table_key(url: str) -> Optional[tuple]:
+    """(wilayah, id_tabel) dari URL /id/25/, dipakai sebagai kunci cache negatif."""
+    wilayah_match = re.search(r'wilayah/([^/]+)', url)
+    id_tabel_match = re.search(r'id_tabel/([^/]+)', url)
+    if not (wilayah_match and id_tabel_match):
+        return None
+    return wilayah_match.group(1), id_tabel_match.group(1)
+
+
+def _fetch_year_payload(url_template: str, tahun: int) -> Optional[Dict[str, Any]]:
+    """Mengambil JSON detail tabel untuk satu tahun lewat session bersama."""
+    url = re.sub(r'tahun/\d{4}', f'tahun/{tahun}', url_template)
+    table_key = _table_key(url_template)
+    try:
+        with stage("fetch_year"):
+            status_code, json_data = fetch_json(url)
+        if status_code != 200:
+            print(f"-> Data tidak tersedia untuk tahun {tahun}.")
+            return None
+        if json_data.get("data-availability") != "available":
+            print(f"-> Data tidak tersedia untuk tahun {tahun}.")
+            if table_key:
+                mark_unavailable(*table_key, tahun)
+            return None
+        if table_key:
+            mark_available(*table_key, tahun)
+        return json_data
+    except CircuitOpenError:
+        # API sedang gangguan: gagalkan task secepatnya daripada menahan slot worker
+        raise
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Kesalahan jaringan untuk tahun {tahun}: {e}")
+    except ValueError as e:
+        print(f"❌ Gagal mengurai data untuk tahun {tahun}. Kesalahan: {e}")
+    return None
+
+
+def fetch_year_payloads(url_template: str, tahun_range, max_workers: Optional[int] = None,
+                        use_negative_cache: bool = False) -> Dict[int, Dict[str, Any]]:
+    """
+    Mengambil payload semua tahun secara bersamaan dengan worker pool terbatas.
+    max_workers=1 berarti mode serial. Mengembalikan {tahun: json_data}
+    hanya untuk tahun yang tersedia. use_negative_cache=True melewati tahun yang
+    baru-baru ini dinyatakan "not available" (lihat negative_cache).
+    """
+    years = sorted(tahun_range, reverse=True)
+    table_key = _table_key(url_template)
+    if use_negative_cache and table_key:
+        skipped = set(unavailable_years(*table_key, years))
+        if skipped:
+            print(f"⏭️ Melewati tahun yang tercatat tidak tersedia: {sorted(skipped, reverse=True)}")
+            incr("years_skipped_negative_cache", len(skipped))
+            years = [tahun for tahun in years if tahun not in skipped]
+    workers = max(1, min(max_workers or FETCH_CONCURRENCY, len(years) or 1))
+    print(f"🔄 Mengambil {len(years)} tahun dengan {workers} worker...")
+
+    payloads = {}
+    with stage("fetch"):
+        if workers == 1:
+            for tahun in years:
+                payloads[tahun] = _fetch_year_payload(url_template, tahun)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Setiap worker menjalankan salinan context agar metrik tercatat di recorder task ini
+                futures = {
+                    tahun: executor.submit(contextvars.copy_context().run, _fetch_year_payload, url_template, tahun)
+                    for tahun in years
+                }
+                for tahun, future in futures.items():
+                    payloads[tahun] = future.result()
+
+    payloads = {tahun: data for tahun, data in payloads.items() if data is not None}
+    gauge("years_available", len(payloads))
+    return payloads
+
+
+def fetch_detail_payloads(url_template: str, max_workers: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+    """Menentukan rentang tahun lalu mengambil payload mentah /id/25/ untuk setiap tahun."""
     tahun_range = get_available_years(url_template)
+    # Tahun dari katalog selalu diambil; cache negatif hanya dipakai untuk rentang tebakan
+    use_negative_cache = not tahun_range
     if not tahun_range:
         current_year = datetime.now().year
         tahun_range = range(current_year - 10, current_year + 1)
         print(f"⚠️ Gagal mendeteksi tahun. Menggunakan rentang tahun default: {list(tahun_range)}")
 
-    all_data = []
+    print("\n--- Memulai Loop Pengambilan Data SIMDASI ---")
+    return fetch_year_payloads(url_template, tahun_range, max_workers=max_workers,
+                               use_negative_cache=use_negative_cache)
+
+
+def payload_fingerprint(json_data: Dict[str, Any], transform_spec: Optional[str] = None,
+                        multiply_flag: bool = False) -> str:
+    """
+    Hash stabil dari isi data satu tahun, dipakai untuk mendeteksi tahun yang berubah.
+    Spesifikasi transformasi (kolom E) dan flag perkalian (kolom D) ikut di-hash sehingga
+    perubahan salah satunya membuat semua tahun dianggap berubah.
+    """
+    try:
+        content = json_data['data'][1]
+    except (KeyError, IndexError, TypeError):
+        content = json_data
+    digest = hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    if transform_spec or multiply_flag:
+        settings = {"spec": transform_spec or None, "multiply_flag": bool(multiply_flag)}
+        digest.update(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def handle_simdasi_detail_table(url_template: str, schema: str, table: str, max_workers: Optional[int] = None,
+                                transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Dict[str, Any]:
+    """Handle complex structure from 'Detail of SIMDASI Table' endpoint (/id/25/)."""
+    payloads = fetch_detail_payloads(url_template, max_workers=max_workers)
+    return build_detail_result(payloads, schema, table, transform=transform)
+
+
+def _clean_labels(raw_labels: List[str], lingkup_id: Optional[str]) -> np.ndarray:
+    """Membersihkan label secara massal: hapus tag HTML, rapikan spasi, tambah prefix 'Kabupaten'."""
+    labels = np.array([' '.join(_HTML_TAG_RE.sub(' ', label).split()) for label in raw_labels], dtype=object)
+
+    # Jika lingkup_id adalah 'kabupaten/kota'
+    if lingkup_id and lingkup_id.lower() == "kabupaten/kota":
+        lowered = pd.Series(labels, dtype=object).str.lower()
+        # Label BUKAN 'kota', 'kabupaten', DAN juga bukan 'jawa timur' -> tambahkan 'Kabupaten' di depan
+        needs_prefix = (~lowered.str.startswith('kota ') &
+                        ~lowered.str.startswith('kabupaten ') &
+                        (lowered != 'jawa timur')).to_numpy()
+        labels[needs_prefix] = "Kabupaten " + labels[needs_prefix]
+    return labels
+
+
+def parse_value_column(raw_values: List[Any]) -> np.ndarray:
+    """
+    Mengubah satu kolom value_raw menjadi angka secara massal.
+    - int/float -> float
+    - string format Indonesia ('1.234,5') -> float; jika gagal, string asli dipertahankan
+    - selain itu (None, dict, list) -> 0.0
+    Hasilnya float64, atau object jika ada string yang tidak bisa diurai.
+    """
+    values = pd.Series(raw_values, dtype=object).to_numpy()
+    kinds = np.array([_VALUE_KINDS.get(t, 0) for t in map(type, raw_values)], dtype=np.int8)
+    num_mask = kinds == 1
+    str_mask = kinds == 2
+
+    result = np.zeros(len(values), dtype=np.float64)
+    if num_mask.any():
+        result[num_mask] = values[num_mask].astype(np.float64)
+    if not str_mask.any():
+        return result
+
+    raw_strings = values[str_mask]
+    cleaned = np.array([value.replace(".", "").replace(",", ".") for value in raw_strings], dtype=object)
+    try:
+        # float() per elemen dijalankan di C oleh NumPy, semantik sama persis dengan float()
+        result[str_mask] = cleaned.astype(np.float64)
+        return result
+    except ValueError:
+        pass
+
+    # Ada string yang gagal (mis. '-' atau '…'): urai ulang per elemen hanya untuk kolom ini
+    unparsed = []
+    for idx, raw, cleaned_string in zip(np.flatnonzero(str_mask), raw_strings, cleaned):
+        try:
+            result[idx] = float(cleaned_string)
+        except (ValueError, TypeError):
+            unparsed.append((idx, raw))
+    if not unparsed:
+        return result
+
+    # Simpan string asli yang tidak bisa diurai (kolom menjadi object)
+    result = result.astype(object)
+    for idx, raw in unparsed:
+        result[idx] = raw
+    return result
+
+
+def _concat_column(parts: List[np.ndarray]) -> np.ndarray:
+    if all(part.dtype != object for part in parts):
+        return np.concatenate(parts)
+    return np.concatenate([part.astype(object, copy=False) for part in parts])
+
+
+def _build_wide_frame(year_blocks: List[tuple]) -> pd.DataFrame:
+    """
+    Menyusun frame wide satu kali dari kolom per tahun (array label/tahun dan list value_raw):
+    urutan akhir (id, id_kategori, label, tahun, variabel...), NaN diisi 0 langsung di array,
+    dan nama kolom dinormalisasi, tanpa salinan DataFrame perantara.
+    """
+    n_total = sum(n_rows for n_rows, _, _ in year_blocks)
+    column_names = list(dict.fromkeys(name for _, _, block in year_blocks for name in block))
+
+    # id_kategori bisa berbeda antar tahun (mms_id baru terisi di tahun berikutnya)
+    id_kategori = pd.to_numeric(
+        pd.Series([value for _, value, _ in year_blocks], dtype=object), errors='coerce'
+    ).fillna(0).astype(int).to_numpy()
+    names = ['id', 'id_kategori']
+    arrays = [np.arange(1, 1 + n_total), np.repeat(id_kategori, [n_rows for n_rows, _, _ in year_blocks])]
+
+    for name in column_names:
+        # Array per tahun dilepas (pop) setelah dipakai agar tidak ada dua salinan sekaligus
+        parts = [(n_rows, block.pop(name, None)) for n_rows, _, block in year_blocks]
+
+        # value_raw dari semua tahun diurai sekaligus dalam satu panggilan per kolom
+        raw_lengths = [len(part) for _, part in parts if isinstance(part, list)]
+        if raw_lengths:
+            parsed = parse_value_column([value for _, part in parts if isinstance(part, list) for value in part])
+            parsed_parts = iter(np.split(parsed, np.cumsum(raw_lengths)[:-1]))
+
+        # Kolom yang tidak ada di suatu tahun diisi NaN, lalu 0 (sama seperti fillna(0))
+        column = _concat_column([
+            next(parsed_parts) if isinstance(part, list)
+            else part if part is not None
+            else np.full(n_rows, np.nan)
+            for n_rows, part in parts
+        ])
+        del parts
+        missing = pd.isna(column)
+        if missing.any():
+            column[missing] = 0
+        names.append(name)
+        arrays.append(column)
+
+    df = pd.DataFrame(dict(enumerate(arrays)), copy=False)
+    df.columns = [normalize_column_name(col) for col in names]
+    return df
+
+
+def report_memory(df_wide: pd.DataFrame, df_long: Optional[pd.DataFrame] = None) -> None:
+    """
+    Mencetak ukuran frame wide/long dan puncak memori (RSS) proses worker.
+    Ukuran frame dihitung tanpa deep=True (isi string tidak ikut dihitung) agar murah.
+    """
+    wide_mb = df_wide.memory_usage().sum() / 1024 ** 2
+    long_mb = df_long.memory_usage().sum() / 1024 ** 2 if df_long is not None else 0.0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"📊 Memori: wide {df_wide.shape} ~{wide_mb:.1f} MB, long ~{long_mb:.1f} MB, "
+          f"puncak RSS proses {peak_mb:.1f} MB.")
+
+
+def build_detail_result(payloads: Dict[int, Dict[str, Any]], schema: str, table: str,
+                        transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                        unpivot: str = 'pandas', long_format: str = 'table') -> Optional[Dict[str, Any]]:
+    """
+    Mengurai payload {tahun: json_data} menjadi frame wide (original_df) dan bentuk long-nya
+    (transposed_df, transpose_plan atau normalized, sesuai unpivot/long_format di config/settings.py).
+    """
+    parse_started = time.perf_counter()
+    year_blocks = []
     label_column_name = 'label'
     id_kategori_value = None
 
-    print("\n--- Memulai Loop Pengambilan Data SIMDASI ---")
-    for tahun in sorted(tahun_range, reverse=True):
-        print(f"🔄 Mengambil tahun {tahun}...")
-        url = re.sub(r'tahun/\d{4}', f'tahun/{tahun}', url_template)
+    # Parsing tetap berurutan (tahun terbaru dulu) agar urutan baris dan 'id' sama seperti mode serial
+    for tahun in sorted(payloads, reverse=True):
+        json_data = payloads[tahun]
         try:
-            response = requests.get(url, timeout=30)
-            if response.status_code != 200 or response.json().get("data-availability") != "available":
-                print(f"-> Data tidak tersedia untuk tahun {tahun}.")
-                continue
-
-            json_data = response.json()
             data_info = json_data['data'][1]
             lingkup_id = data_info.get("lingkup_id")
             mms_id = data_info.get("mms_id")
@@ -134,96 +571,100 @@ def handle_simdasi_detail_table(url_template: str, schema: str, table: str) -> D
             kolom_order = list(kolom_metadata.keys())
             kolom_labels = [kolom_metadata[k]['nama_variabel'] for k in kolom_order]
 
-            for row in data_info.get('data', []):
-                clean_label = ' '.join(re.sub(r'<[^>]+>', ' ', row.get('label', '')).split())
-                      # Jika lingkup_id adalah 'kabupaten/kota'
-                if lingkup_id and lingkup_id.lower() == "kabupaten/kota":
-                    # Periksa apakah label BUKAN 'kota', 'kabupaten', DAN juga bukan 'jawa timur'
-                    if (not clean_label.lower().startswith('kota ') and
-                        not clean_label.lower().startswith('kabupaten ') and
-                        clean_label.lower() != 'jawa timur'):
-                        
-                        # Jika semua kondisi terpenuhi, tambahkan 'Kabupaten' di depan
-                        clean_label = f"Kabupaten {clean_label}"
-                record = {
-                    label_column_name: clean_label,
-                    'tahun': tahun,
-                    'id_kategori': id_kategori_value
+            rows = data_info.get('data', [])
+            raw_labels = [row.get('label', '') for row in rows]
+            # Label non-string tidak bisa dibersihkan: baris sebelum label tersebut tetap dipakai,
+            # lalu tahun ini dianggap gagal diurai (sama seperti parser per baris sebelumnya)
+            bad_label_index = next((i for i, label in enumerate(raw_labels) if not isinstance(label, str)), None)
+            if bad_label_index is not None:
+                rows = rows[:bad_label_index]
+                raw_labels = raw_labels[:bad_label_index]
+
+            if rows:
+                n_rows = len(rows)
+                block = {
+                    label_column_name: _clean_labels(raw_labels, lingkup_id),
+                    'tahun': np.full(n_rows, tahun),
                 }
-
-                variables_data = row.get('variables')
+                variables = [row.get('variables') for row in rows]
+                variables = [v if isinstance(v, dict) else {} for v in variables]
                 for key, label in zip(kolom_order, kolom_labels):
-                    value = None
-                    if isinstance(variables_data, dict):
-                        value_dict = variables_data.get(key, {})
-                        if isinstance(value_dict, dict):
-                            value = value_dict.get('value_raw')
-
-                    cleaned_value = 0.0
-                    if isinstance(value, (int, float)):
-                        cleaned_value = float(value)
-                    elif isinstance(value, str):
-                        try:
-                            cleaned_string = value.replace(".", "").replace(",", ".")
-                            cleaned_value = float(cleaned_string)
-                        except (ValueError, TypeError):
-                            cleaned_value = value
-
-                    record[label] = cleaned_value
-
-                all_data.append(record)
+                    value_dicts = [v.get(key) for v in variables]
+                    # Disimpan mentah; dikonversi massal per kolom di _build_wide_frame
+                    block[label] = [d.get('value_raw') if isinstance(d, dict) else None for d in value_dicts]
+                year_blocks.append((n_rows, id_kategori_value, block))
+
+            if bad_label_index is not None:
+                raise TypeError(f"label baris ke-{bad_label_index} bukan string")
             print(f"-> Berhasil memproses data untuk tahun {tahun}.")
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Kesalahan jaringan untuk tahun {tahun}: {e}")
-        except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+        except (KeyError, IndexError, TypeError) as e:
             print(f"❌ Gagal mengurai data untuk tahun {tahun}. Kesalahan: {e}")
 
-    if not all_data:
+    if not year_blocks:
         print("\n⚠️ Tidak ada data yang berhasil dikumpulkan dari rentang tahun yang ditentukan.")
         return None
 
-    df = pd.DataFrame(all_data)
-    df['id'] = range(1, 1 + len(df))
-
-    if 'id_kategori' in df.columns:
-        df['id_kategori'] = pd.to_numeric(df['id_kategori'], errors='coerce').fillna(0).astype(int)
-    else:
-        df['id_kategori'] = 0
-
-    cols = df.columns.tolist()
-    cols.remove('id')
-    if 'id_kategori' in cols:
-        cols.remove('id_kategori')
-    new_order = ['id', 'id_kategori'] + [col for col in cols if col not in ['id', 'id_kategori']]
-    df = df[new_order]
-
-    df = df.fillna(0)
-    df.columns = [normalize_column_name(col) for col in df.columns]
+    df = _build_wide_frame(year_blocks)
+    timing("parse", time.perf_counter() - parse_started)
+    if transform is not None:
+        with stage("transform"):
+            df = transform(df)
 
     original_full_table_name = f"{schema}.{table}"
-    df_transposed, cleansing_full_table_name = transpose_if_needed(df.copy(), table, schema)
+    transpose_plan = None
+    normalized = None
+    if long_format == 'normalized':
+        # Tabel _cl menjadi view di atas tabel fakta + dimensi (lihat bulk_load_normalized)
+        transpose_plan = plan_transpose(df, table, schema)
+        df_transposed = None
+        cleansing_full_table_name = transpose_plan["table"] if transpose_plan else None
+        if transpose_plan:
+            with stage("transpose"):
+                normalized = normalize_long(df, transpose_plan)
+            gauge("rows_transposed", len(normalized['fact']))
+    elif unpivot == 'database':
+        # Hanya rencana unpivot; tabel _cl dibangun di PostgreSQL oleh bulk_load_with_unpivot
+        transpose_plan = plan_transpose(df, table, schema)
+        df_transposed = None
+        cleansing_full_table_name = transpose_plan["table"] if transpose_plan else None
+    else:
+        # melt tidak mengubah df, jadi tidak perlu salinan defensif
+        with stage("transpose"):
+            df_transposed, cleansing_full_table_name = transpose_if_needed(df, table, schema)
+    report_memory(df, df_transposed)
+    gauge("rows_original", len(df))
+    gauge("columns_original", len(df.columns))
+    if df_transposed is not None:
+        gauge("rows_transposed", len(df_transposed))
 
     return {
         "original_df": df,
         "original_table": original_full_table_name,
         "transposed_df": df_transposed,
-        "transposed_table": cleansing_full_table_name
+        "transposed_table": cleansing_full_table_name,
+        "transpose_plan": transpose_plan,
+        "normalized": normalized,
+        "label_column": normalize_column_name(label_column_name)
     }
 
 
 def normalize_column_name(col: str) -> str:
     """Normalize string into valid column name."""
     col = str(col).lower().strip()
-    col = re.sub(r'<[^>]+>', ' ', col)
-    col = re.sub(r'[^a-z0-9\s_]', '', col)
-    col = re.sub(r'\s+', '_', col)
+    col = _HTML_TAG_RE.sub(' ', col)
+    col = _INVALID_COLUMN_CHARS_RE.sub('', col)
+    col = _WHITESPACE_RE.sub('_', col)
     return col
 
-def transpose_if_needed(df: pd.DataFrame, table: str, schema: str) -> tuple:
-    """Transpose (unpivot) dataframe if column count > 5."""
+def plan_transpose(df: pd.DataFrame, table: str, schema: str) -> Optional[Dict[str, Any]]:
+    """
+    Menentukan kolom id, kolom nilai, dan nama tabel _cl untuk unpivot, atau None jika
+    tabel tidak perlu / tidak bisa ditranspose. Dipakai oleh melt di pandas maupun
+    unpivot di database (save_data_simdasi.bulk_load_with_unpivot).
+    """
     if df.shape[1] <= 5:
         print("ℹ️ Data tidak ditranspose karena jumlah kolom <= 5.")
-        return None, None
+        return None
 
     id_cols = ['id', 'id_kategori', 'tahun']
     potential_label_cols = [col for col in df.columns if col not in id_cols and df[col].dtype == 'object']
@@ -233,25 +674,72 @@ def transpose_if_needed(df: pd.DataFrame, table: str, schema: str) -> tuple:
         id_cols.append(label_col_name)
     else:
         print("⚠️ Could not identify the label column for transposition. Skipping transpose.")
-        return None, None
+        return None
 
     value_cols = [col for col in df.columns if col not in id_cols]
 
     if not value_cols:
         print("⚠️ No value columns found for transposition. Skipping transpose.")
+        return None
+
+    max_base_length = 63 - len("_cl") - 1
+    short_table_name = table[:max_base_length]
+    cleansing_table_name = f"{short_table_name.rstrip('_')}_cl"
+
+    return {
+        "id_cols": id_cols,
+        "value_cols": value_cols,
+        "var_name": 'kategori',
+        "value_name": 'jumlah',
+        "table": f"{schema}.{cleansing_table_name}",
+    }
+
+def normalize_long(df: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    """
+    Versi ter-normalisasi dari hasil melt tanpa membuat kolom string panjang:
+    - 'kategori': dimensi (kategori_id, kategori) dari nama kolom nilai
+    - 'wilayah': dimensi (label_id, <kolom label>) dari label unik (urutan kemunculan)
+    - 'fact': (id, id_kategori, tahun, label_id, kategori_id, jumlah) dengan urutan baris
+      sama seperti pd.melt; label dan kategori hanya disimpan sebagai kode integer.
+    """
+    label_col = plan["id_cols"][3]
+    value_cols = plan["value_cols"]
+    n_rows, n_values = len(df), len(value_cols)
+
+    label_codes, label_values = pd.factorize(df[label_col], sort=False)
+    values = [df[col].to_numpy() for col in value_cols]
+    # Kolom object (ada string yang tidak bisa diurai) membuat 'jumlah' object, sama seperti melt
+    jumlah = np.concatenate(values) if values else np.array([], dtype=np.float64)
+
+    fact = pd.DataFrame({
+        'id': np.tile(df['id'].to_numpy(), n_values),
+        'id_kategori': np.tile(df['id_kategori'].to_numpy(), n_values),
+        'tahun': np.tile(df['tahun'].to_numpy(), n_values),
+        'label_id': np.tile(label_codes.astype(np.int64) + 1, n_values),
+        'kategori_id': np.repeat(np.arange(1, n_values + 1, dtype=np.int64), n_rows),
+        plan["value_name"]: jumlah,
+    }, copy=False)
+    return {
+        'kategori': pd.DataFrame({'kategori_id': np.arange(1, n_values + 1, dtype=np.int64),
+                                  plan["var_name"]: pd.Series(value_cols, dtype=object)}),
+        'wilayah': pd.DataFrame({'label_id': np.arange(1, len(label_values) + 1, dtype=np.int64),
+                                 label_col: np.asarray(label_values, dtype=object)}),
+        'fact': fact,
+    }
+
+def transpose_if_needed(df: pd.DataFrame, table: str, schema: str) -> tuple:
+    """Transpose (unpivot) dataframe if column count > 5."""
+    plan = plan_transpose(df, table, schema)
+    if plan is None:
         return None, None
 
     df_transposed = pd.melt(
         df,
-        id_vars=id_cols,
-        value_vars=value_cols,
-        var_name='kategori',
-        value_name='jumlah'
+        id_vars=plan["id_cols"],
+        value_vars=plan["value_cols"],
+        var_name=plan["var_name"],
+        value_name=plan["value_name"]
     )
 
-    max_base_length = 63 - len("_cl") - 1
-    short_table_name = table[:max_base_length]
-    cleansing_table_name = f"{short_table_name.rstrip('_')}_cl"
-
     print(f"✅Yeay Data berhasil ditranspose menjadi format long (jumlah baris: {len(df_transposed)}).")
-    return df_transposed, f"{schema}.{cleansing_table_name}"
\ No newline at end of file
+    return df_transposed, plan["table"]
@@ -0,0 +1,140 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from bps_helpers.config.settings import (
+    HTTP_POOL_MAXSIZE, HTTP_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT, DATA_DIR,
+)
+from bps_helpers.file_utils import atomic_write
+from bps_helpers.metrics import incr
+
+# Status yang dianggap gangguan sementara dan layak di-retry
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Status circuit breaker dibagikan antar proses (task paralel) lewat file di DATA_DIR
+CIRCUIT_STATE_DIR = os.path.join(DATA_DIR, "circuit_breaker")
+
+_session = None
+_session_lock = threading.Lock()
+# host -> jumlah kegagalan berturut-turut di proses ini
+_failures: Dict[str, int] = {}
+# host yang circuit-nya pernah terlihat terbuka di proses ini (file state perlu dibersihkan saat sukses)
+_open_seen: Set[str] = set()
+_failures_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Request tidak dikirim karena circuit breaker untuk host tersebut sedang terbuka."""
+
+
+def get_session() -> requests.Session:
+    """
+    Mengembalikan satu requests.Session bersama (keep-alive) untuk seluruh proses.
+    Koneksi TCP/TLS ke webapi.bps.go.id dipakai ulang antar request dan antar thread.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_MAXSIZE, pool_maxsize=HTTP_POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _circuit_path(host: str) -> str:
+    return os.path.join(CIRCUIT_STATE_DIR, f"{host.replace(':', '_')}.json")
+
+
+def _open_until(host: str) -> float:
+    try:
+        with open(_circuit_path(host), "r", encoding="utf-8") as f:
+            return float(json.load(f)["open_until"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0.0
+
+
+def _set_open_until(host: str, open_until: float) -> None:
+    try:
+        atomic_write(_circuit_path(host), json.dumps({"open_until": open_until}))
+    except OSError as e:
+        print(f"⚠️ Gagal menyimpan status circuit breaker: {e}")
+
+
+def _record_failure(host: str) -> None:
+    with _failures_lock:
+        _failures[host] = _failures.get(host, 0) + 1
+        failures = _failures[host]
+    if failures >= CIRCUIT_FAILURE_THRESHOLD:
+        print(f"🚫 Circuit breaker untuk {host} terbuka selama {CIRCUIT_RESET_TIMEOUT} detik "
+              f"setelah {failures} kegagalan berturut-turut.")
+        incr("circuit_opened")
+        with _failures_lock:
+            _open_seen.add(host)
+        # Hitungan tidak di-reset: setelah timeout, satu kegagalan lagi langsung membuka circuit (half-open)
+        _set_open_until(host, time.time() + CIRCUIT_RESET_TIMEOUT)
+
+
+def _record_success(host: str) -> None:
+    # Jalur normal tanpa I/O disk: file state hanya dibuka jika proses ini pernah
+    # gagal atau pernah melihat circuit terbuka
+    with _failures_lock:
+        dirty = _failures.get(host, 0) > 0 or host in _open_seen
+        _failures[host] = 0
+        _open_seen.discard(host)
+    if dirty and _open_until(host):
+        _set_open_until(host, 0.0)
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Exponential backoff dengan full jitter; Retry-After dari server dipakai jika lebih lama."""
+    delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(float(retry_after), HTTP_BACKOFF_MAX))
+    return delay
+
+
+def get_with_retry(url: str, timeout: int = HTTP_TIMEOUT) -> requests.Response:
+    """
+    GET lewat session bersama dengan retry (error jaringan, timeout, 429/5xx) memakai
+    exponential backoff + jitter, dan circuit breaker per host. Saat circuit terbuka,
+    CircuitOpenError langsung dilempar tanpa request ke jaringan.
+    Respons 429/5xx terakhir dikembalikan apa adanya jika retry habis.
+    """
+    host = urlparse(url).netloc
+    open_until = _open_until(host)
+    if open_until:
+        with _failures_lock:
+            _open_seen.add(host)
+    if open_until > time.time():
+        incr("circuit_rejected")
+        raise CircuitOpenError(f"Circuit breaker untuk {host} terbuka sampai "
+                               f"{time.strftime('%H:%M:%S', time.localtime(open_until))}")
+
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            response = get_session().get(url, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            _record_failure(host)
+            if attempt >= HTTP_MAX_RETRIES or _open_until(host) > time.time():
+                raise
+            delay = _backoff_delay(attempt)
+            print(f"🔁 Retry {attempt + 1}/{HTTP_MAX_RETRIES} dalam {delay:.1f} detik ({type(e).__name__})")
+        else:
+            if response.status_code not in RETRY_STATUS_CODES:
+                _record_success(host)
+                return response
+            _record_failure(host)
+            if attempt >= HTTP_MAX_RETRIES or _open_until(host) > time.time():
+                return response
+            delay = _backoff_delay(attempt, response.headers.get("Retry-After"))
+            print(f"🔁 Retry {attempt + 1}/{HTTP_MAX_RETRIES} dalam {delay:.1f} detik (HTTP {response.status_code})")
+        incr("http_retries")
+        time.sleep(delay)
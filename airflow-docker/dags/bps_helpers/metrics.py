@@ -0,0 +1,133 @@
+import contextvars
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from bps_helpers.config.settings import STATSD_HOST, STATSD_PORT, STATSD_PREFIX
+
+# Instrumentasi per tabel: waktu per tahap, counter (byte, request, baris) dan gauge.
+# Recorder aktif disimpan di contextvar; helper cukup memanggil stage()/incr()/gauge()
+# dan tidak melakukan apa-apa jika tidak ada recorder (mis. dipanggil di luar task).
+_METRIC_NAME_RE = re.compile(r'[^A-Za-z0-9_.-]')
+_current: contextvars.ContextVar[Optional["MetricsRecorder"]] = contextvars.ContextVar("bps_metrics", default=None)
+_socket = None
+_socket_lock = threading.Lock()
+
+
+def _send(lines) -> None:
+    """Mengirim baris StatsD lewat UDP (fire-and-forget). Kegagalan kirim diabaikan."""
+    global _socket
+    if not STATSD_HOST:
+        return
+    try:
+        if _socket is None:
+            with _socket_lock:
+                if _socket is None:
+                    _socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _socket.sendto("\n".join(lines).encode("utf-8"), (STATSD_HOST, STATSD_PORT))
+    except OSError:
+        pass
+
+
+class MetricsRecorder:
+    """Kumpulan metrik untuk satu tabel (scope 'schema.table'), aman dipakai dari banyak thread."""
+
+    def __init__(self, scope: str, attempt: int = 1):
+        self.scope = scope
+        self.attempt = attempt
+        self.started_at = time.time()
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._prefix = _METRIC_NAME_RE.sub('_', f"{STATSD_PREFIX}.{scope}")
+
+    def timing(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stat = self.timings.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stat["count"] += 1
+            stat["total_s"] += seconds
+            stat["max_s"] = max(stat["max_s"], seconds)
+        _send([f"{self._prefix}.{name}:{seconds * 1000:.3f}|ms"])
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        _send([f"{self._prefix}.{name}:{value}|c"])
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+        _send([f"{self._prefix}.{name}:{value}|g"])
+
+    def summary(self) -> Dict[str, Any]:
+        """Ringkasan JSON-serializable untuk log dan XCom."""
+        with self._lock:
+            return {
+                "table": self.scope,
+                "attempt": self.attempt,
+                "retries": max(self.attempt - 1, 0),
+                "duration_s": round(time.time() - self.started_at, 3),
+                "stages": {name: {k: round(v, 4) if isinstance(v, float) else v for k, v in stat.items()}
+                           for name, stat in self.timings.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+
+
+def current_recorder() -> Optional[MetricsRecorder]:
+    return _current.get()
+
+
+@contextmanager
+def task_metrics(scope: str, attempt: int = 1):
+    """Mengaktifkan recorder baru untuk satu tabel, lalu mengirim durasi total saat selesai."""
+    recorder = MetricsRecorder(scope, attempt=attempt)
+    token = _current.set(recorder)
+    try:
+        with stage("total"):
+            yield recorder
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Mengukur durasi satu tahap (catalog_lookup, fetch_year, parse, transpose, write_*, ...)."""
+    recorder = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if recorder is not None:
+            recorder.timing(name, time.perf_counter() - start)
+
+
+def timing(name: str, seconds: float) -> None:
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.timing(name, seconds)
+
+
+def incr(name: str, value: float = 1) -> None:
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.incr(name, value)
+
+
+def gauge(name: str, value: float) -> None:
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.gauge(name, value)
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Satu baris ringkas per tahap untuk log task."""
+    lines = [f"📊 Ringkasan {summary['table']} ({summary['duration_s']}s, percobaan ke-{summary['attempt']}):"]
+    for name, stat in summary["stages"].items():
+        lines.append(f"   {name:<22} {stat['total_s']:>9.3f}s  x{stat['count']}")
+    for name, value in {**summary["counters"], **summary["gauges"]}.items():
+        lines.append(f"   {name:<22} {value:>10}")
+    return "\n".join(lines)
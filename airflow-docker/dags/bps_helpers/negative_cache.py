@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+from bps_helpers.config.settings import DATA_DIR, NEGATIVE_CACHE_TTL
+from bps_helpers.file_utils import _UNSAFE_CHARS_RE, atomic_write
+
+# Cache persisten untuk kombinasi (tabel, wilayah, tahun) yang dinyatakan "not available".
+# Satu file per (wilayah, tabel) sehingga task paralel untuk tabel berbeda tidak saling menimpa.
+NEGATIVE_CACHE_DIR = os.path.join(DATA_DIR, "negative_cache")
+
+# (wilayah, id_tabel) -> {tahun: kedaluwarsa}
+_entries: Dict[Tuple[str, str], Dict[int, float]] = {}
+_lock = threading.Lock()
+
+
+def _path(wilayah: str, id_tabel: str) -> str:
+    return os.path.join(NEGATIVE_CACHE_DIR, _UNSAFE_CHARS_RE.sub('_', f"{wilayah}_{id_tabel}") + ".json")
+
+
+def _load(wilayah: str, id_tabel: str) -> Dict[int, float]:
+    key = (wilayah, id_tabel)
+    if key not in _entries:
+        try:
+            with open(_path(wilayah, id_tabel), "r", encoding="utf-8") as f:
+                _entries[key] = {int(tahun): float(expires) for tahun, expires in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            _entries[key] = {}
+    return _entries[key]
+
+
+def _save(wilayah: str, id_tabel: str, entries: Dict[int, float]) -> None:
+    try:
+        atomic_write(_path(wilayah, id_tabel), json.dumps({str(tahun): expires for tahun, expires in entries.items()}))
+    except OSError as e:
+        print(f"⚠️ Gagal menulis cache negatif ke disk: {e}")
+
+
+def unavailable_years(wilayah: str, id_tabel: str, years: Iterable[int]) -> List[int]:
+    """Tahun dari `years` yang tercatat tidak tersedia dan belum kedaluwarsa."""
+    now = time.time()
+    with _lock:
+        entries = _load(wilayah, id_tabel)
+        return [tahun for tahun in years if entries.get(tahun, 0) > now]
+
+
+def mark_unavailable(wilayah: str, id_tabel: str, tahun: int) -> None:
+    """Mencatat tahun yang dinyatakan API tidak tersedia, berlaku NEGATIVE_CACHE_TTL detik."""
+    now = time.time()
+    with _lock:
+        entries = _load(wilayah, id_tabel)
+        entries[tahun] = now + NEGATIVE_CACHE_TTL
+        # Entri kedaluwarsa ikut dibuang setiap kali file ditulis
+        for expired in [t for t, expires in entries.items() if expires <= now]:
+            del entries[expired]
+        _save(wilayah, id_tabel, entries)
+
+
+def mark_available(wilayah: str, id_tabel: str, tahun: int) -> None:
+    """Menghapus tahun dari cache negatif setelah datanya ternyata tersedia."""
+    with _lock:
+        entries = _load(wilayah, id_tabel)
+        if entries.pop(tahun, None) is not None:
+            _save(wilayah, id_tabel, entries)
+
+
+def clear_negative_cache() -> None:
+    """Kosongkan cache negatif in-process dan semua file di disk."""
+    with _lock:
+        _entries.clear()
+    if os.path.isdir(NEGATIVE_CACHE_DIR):
+        for name in os.listdir(NEGATIVE_CACHE_DIR):
+            try:
+                os.remove(os.path.join(NEGATIVE_CACHE_DIR, name))
+            except OSError:
+                pass
@@ -0,0 +1,155 @@
+"""
+Logika pemrosesan satu tabel SIMDASI yang dijalankan oleh task 'process_api'.
+Modul ini (beserta pandas, numpy, requests, psycopg2, SQLAlchemy) hanya di-import
+saat task berjalan, bukan saat DAG di-parse.
+"""
+from bps_helpers.get_data_simdasi import fetch_detail_payloads, build_detail_result, payload_fingerprint, process_url, simdasi_endpoint_id
+from bps_helpers.save_data_simdasi import save_to_postgres, bulk_load_with_unpivot, bulk_load_normalized, upsert_year_slices, load_state, save_load_state, get_table_columns
+from bps_helpers.response_archive import replay_mode, is_replay_enabled
+from bps_helpers.metrics import task_metrics, stage, gauge, format_summary
+from bps_helpers.transform_spec import compile_transform
+from bps_helpers.config.settings import UNPIVOT_MODE, LONG_FORMAT
+
+def process_simdasi_url(url: str, schema: str, table: str, multiply: bool = False, mode: str = 'incremental', replay: bool = False, transform: str = None, unpivot: str = UNPIVOT_MODE, long_format: str = LONG_FORMAT, dry_run: bool = False, ti=None):
+    """
+    Memproses satu tabel SIMDASI dan mengembalikan ringkasan metrik (XCom) dengan success=False jika
+    tidak ada data atau penyimpanan gagal. Mode unpivot/long_format/replay: lihat config/settings.py.
+    """
+    attempt = getattr(ti, 'try_number', None) or 1
+    with task_metrics(f"{schema}.{table}", attempt=attempt) as metrics:
+        saved = _load_simdasi_url(url, schema, table, multiply, transform, mode, replay, unpivot, long_format, dry_run)
+    summary = metrics.summary()
+    summary["success"] = saved is not False
+    print(format_summary(summary))
+    return summary
+
+def _load_simdasi_url(url: str, schema: str, table: str, multiply: bool, transform_spec, mode: str, replay: bool, unpivot: str, long_format: str, dry_run: bool = False):
+    endpoint_id = simdasi_endpoint_id(url)
+    if endpoint_id and endpoint_id != '25':
+        if transform_spec or multiply:
+            print("⚠️ Transformasi / flag perkalian diabaikan untuk endpoint daftar.")
+        return _load_simdasi_list(url, schema, table, replay, dry_run)
+
+    # Dikompilasi sekali di awal: spesifikasi yang salah langsung menggagalkan task sebelum fetch
+    transform = compile_transform(transform_spec, multiply_flag=multiply)
+    print(f"🔁 Processing URL: {url} (mode: {mode})")
+    full_table_original = f"{schema}.{table}"
+
+    # Memanggil fungsi dari file get_simdasi.py (dari arsip lokal jika replay)
+    with replay_mode(replay or is_replay_enabled()):
+        payloads = fetch_detail_payloads(url)
+    if not payloads:
+        print("⚠️ No data processed from helper")
+        return False
+    fingerprints = {tahun: payload_fingerprint(data, transform_spec, multiply) for tahun, data in payloads.items()}
+
+    if dry_run:
+        result = build_detail_result(payloads, schema, table, transform=transform, unpivot=unpivot, long_format=long_format)
+        if result is None:
+            print("⚠️ No data processed from helper")
+            return False
+        print(f"🧪 Dry run {full_table_original}: {len(result['original_df'])} baris x {len(result['original_df'].columns)} kolom, "
+              f"tahun {sorted(payloads)}. Tidak ada yang ditulis.")
+        return
+
+    if mode == 'incremental':
+        with stage("load_state"):
+            stored = load_state(full_table_original)
+        changed_years = sorted((tahun for tahun, fp in fingerprints.items() if stored.get(tahun) != fp), reverse=True)
+        if not changed_years:
+            print("✅ Tidak ada tahun yang berubah sejak load terakhir. Tidak ada yang ditulis.")
+            return
+        print(f"🔎 Tahun yang berubah / baru: {changed_years}")
+
+        with stage("load_state"):
+            existing_columns = get_table_columns(full_table_original)
+        if stored and existing_columns is not None:
+            result = build_detail_result({tahun: payloads[tahun] for tahun in changed_years}, schema, table,
+                                         transform=transform, unpivot=unpivot, long_format=long_format)
+            if result is None:
+                print("⚠️ No data processed from helper")
+                return False
+
+            if set(result["original_df"].columns) == set(existing_columns):
+                with stage("write_incremental"):
+                    success, message = upsert_year_slices([
+                        (result["original_df"], full_table_original),
+                        (result["transposed_df"], result["transposed_table"]),
+                    ], unpivot_plan=result["transpose_plan"], normalized=result["normalized"])
+                print(f"{'✅YEY BISA' if success else '❌YAH GABISA'} {message}")
+                if success:
+                    with stage("save_state"):
+                        save_load_state(full_table_original, {tahun: fingerprints[tahun] for tahun in changed_years})
+                    return
+            else:
+                print("⚠️ Struktur kolom berubah dibanding tabel yang ada.")
+        print("ℹ️ Beralih ke full replace untuk tabel ini.")
+
+    result = build_detail_result(payloads, schema, table, transform=transform, unpivot=unpivot, long_format=long_format)
+
+    if result is None:
+        print("⚠️ No data processed from helper")
+        return False
+
+    #Menyimpan data yang sudah (atau tidak) dimodifikasi ke database
+    all_saved = True
+    if result["normalized"] is not None and not result["original_df"].empty:
+        # Tabel wide, dimensi, fakta, dan view _cl ditulis bersama
+        with stage("write_normalized"):
+            success, message = bulk_load_normalized(result["original_df"], full_table_original,
+                                                    result["normalized"], result["transpose_plan"])
+        all_saved = all_saved and success
+        print(f"{'✅YEY BISA' if success else '❌YAH GABISA'} {message}")
+    elif result["transpose_plan"] is not None and not result["original_df"].empty:
+        # Tabel wide dan _cl ditulis bersama, unpivot di PostgreSQL
+        with stage("write_unpivot"):
+            success, message = bulk_load_with_unpivot(result["original_df"], full_table_original, result["transpose_plan"])
+        all_saved = all_saved and success
+        print(f"{'✅YEY BISA' if success else '❌YAH GABISA'} {message}")
+    elif result["original_df"] is not None and not result["original_df"].empty:
+        with stage("write_original"):
+            success, message = save_to_postgres(result["original_df"], full_table_original)
+        all_saved = all_saved and success
+        print(f"{'✅YEY BISA' if success else '❌YAH GABISA'} {message}")
+    else:
+        print("⚠️ No original data to save")
+
+    # Save transposed data
+    if result["transposed_df"] is not None and not result["transposed_df"].empty:
+        with stage("write_transposed"):
+            success, message = save_to_postgres(result["transposed_df"], result["transposed_table"])
+        all_saved = all_saved and success
+        print(f"{'✅CONGRATS' if success else '❌YAH GABISA'} {message}")
+    elif result["transpose_plan"] is None:
+        print("⚠️ No transposed data to save")
+
+    if all_saved:
+        with stage("save_state"):
+            # Full replace: state diganti, bukan digabung (tahun yang hilang ikut dihapus)
+            save_load_state(full_table_original, fingerprints, replace=True)
+    return all_saved
+
+def _load_simdasi_list(url: str, schema: str, table: str, replay: bool, dry_run: bool = False):
+    """
+    Endpoint daftar / master data (id/22, 23, 24, 26, 27, 28, 34, 36) selalu dimuat full:
+    placeholder {parent} / {wilayah} di URL di-fan-out ke semua provinsi dan kabupaten/kota,
+    hasilnya digabung jadi satu tabel dan ditulis sekali lewat COPY.
+    """
+    print(f"🔁 Processing list URL: {url} (mode: full)")
+    with replay_mode(replay or is_replay_enabled()):
+        df, default_table = process_url(url, schema=schema, table=table)
+    full_table = f"{schema}.{table or default_table}"
+    if df.empty:
+        print("⚠️ No data processed from helper")
+        return False
+    gauge("rows_original", len(df))
+    gauge("columns_original", len(df.columns))
+
+    if dry_run:
+        print(f"🧪 Dry run {full_table}: {len(df)} baris x {len(df.columns)} kolom. Tidak ada yang ditulis.")
+        return
+
+    with stage("write_original"):
+        success, message = save_to_postgres(df, full_table)
+    print(f"{'✅YEY BISA' if success else '❌YAH GABISA'} {message}")
+    return success
@@ -0,0 +1,106 @@
+import gzip
+import json
+import os
+import threading
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from bps_helpers.config.settings import ARCHIVE_DIR, ARCHIVE_ENABLED, REPLAY_MODE, HTTP_TIMEOUT
+from bps_helpers.file_utils import _UNSAFE_CHARS_RE, atomic_write
+from bps_helpers.http_client import get_with_retry
+from bps_helpers.metrics import incr
+
+# Arsip respons mentah SIMDASI: satu file .json.gz per (endpoint, wilayah, tabel, tahun),
+# selalu berisi respons terakhir yang berhasil diambil (HTTP 200). API key tidak pernah
+# ikut tersimpan, baik di nama file maupun di isi arsip.
+_replay_enabled = REPLAY_MODE
+_replay_lock = threading.Lock()
+
+
+def is_replay_enabled() -> bool:
+    return _replay_enabled
+
+
+@contextmanager
+def replay_mode(enabled: bool = True):
+    """Mengaktifkan (atau mematikan) mode replay selama blok with, lalu kembali ke nilai sebelumnya."""
+    global _replay_enabled
+    with _replay_lock:
+        previous = _replay_enabled
+        _replay_enabled = enabled
+    try:
+        yield
+    finally:
+        with _replay_lock:
+            _replay_enabled = previous
+
+
+def _url_params(url: str) -> Dict[str, str]:
+    """Mengubah path '/id/25/tahun/2024/.../key/abc/' menjadi {'id': '25', 'tahun': '2024', ...}."""
+    segments = [s for s in urlparse(url).path.split('/') if s]
+    if 'simdasi' in segments:
+        segments = segments[segments.index('simdasi') + 1:]
+    return dict(zip(segments[0::2], segments[1::2]))
+
+
+def archive_path(url: str) -> str:
+    """
+    Lokasi arsip untuk sebuah URL:
+    ARCHIVE_DIR/id{endpoint}/wilayah_{wilayah}/{id_tabel}/tahun_{tahun}.json.gz
+    Parameter lain (selain key) ikut masuk nama file agar tidak saling menimpa.
+    """
+    params = _url_params(url)
+    params.pop('key', None)
+    endpoint = params.pop('id', 'unknown')
+    wilayah = params.pop('wilayah', 'all')
+    id_tabel = params.pop('id_tabel', 'list')
+    tahun = params.pop('tahun', 'all')
+    extra = "".join(f"__{k}_{v}" for k, v in sorted(params.items()))
+    parts = [f"id{endpoint}", f"wilayah_{wilayah}", id_tabel, f"tahun_{tahun}{extra}.json.gz"]
+    return os.path.join(ARCHIVE_DIR, *(_UNSAFE_CHARS_RE.sub('_', p) for p in parts))
+
+
+def save_response(url: str, content: bytes) -> None:
+    """Menyimpan body respons mentah (terkompresi) secara atomik. Kegagalan tulis hanya diberi peringatan."""
+    path = archive_path(url)
+    try:
+        atomic_write(path, content, opener=partial(gzip.open, compresslevel=6))
+    except OSError as e:
+        print(f"⚠️ Gagal menulis arsip respons ke disk: {e}")
+
+
+def load_response(url: str) -> Optional[bytes]:
+    """Membaca body respons mentah dari arsip, atau None jika belum pernah diarsipkan."""
+    try:
+        with gzip.open(archive_path(url), "rb") as f:
+            return f.read()
+    except (OSError, EOFError):
+        return None
+
+
+def fetch_json(url: str, timeout: int = HTTP_TIMEOUT) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """
+    Mengambil JSON dari API (session bersama, retry + circuit breaker) dan mengarsipkan respons 200.
+    Dalam mode replay, respons dibaca dari arsip saja (404 jika tidak ada di arsip).
+    Mengembalikan (status_code, json_data); json_data None jika status bukan 200.
+    Error jaringan (requests) dan JSON rusak (ValueError) diteruskan ke pemanggil.
+    """
+    if _replay_enabled:
+        content = load_response(url)
+        if content is None:
+            print(f"-> Tidak ada di arsip: {archive_path(url)}")
+            return 404, None
+        incr("archive_reads")
+        incr("archive_bytes", len(content))
+        return 200, json.loads(content)
+
+    response = get_with_retry(url, timeout=timeout)
+    incr("http_requests")
+    incr("bytes_downloaded", len(response.content))
+    if response.status_code != 200:
+        return response.status_code, None
+    json_data = response.json()
+    if ARCHIVE_ENABLED:
+        save_response(url, response.content)
+    return 200, json_data
@@ -1,42 +1,507 @@
-import psycopg2
+import hashlib
+import io
+from psycopg2 import sql
 import pandas as pd
-from sqlalchemy import create_engine
-from typing import Tuple
-from bps_helpers.config.db_config import DB_CONFIG
+from typing import Any, Dict, List, Optional, Tuple
+from bps_helpers.config.db_config import db_cursor, ensure_schema, get_engine
 
-def save_to_postgres(df: pd.DataFrame, full_table_name: str) -> Tuple[bool, str]:
+# Batas panjang identifier PostgreSQL
+MAX_IDENTIFIER_LENGTH = 63
+STAGING_SUFFIX = "__staging"
+# Tabel status per (tabel, tahun) untuk mode incremental, dibuat di setiap skema tujuan
+LOAD_STATE_TABLE = "simdasi_load_state"
+
+
+def truncate_identifier(name: str) -> str:
+    """Memotong nama seperti PostgreSQL (maks. 63 byte, tidak memotong karakter multibyte)."""
+    return name.encode("utf-8")[:MAX_IDENTIFIER_LENGTH].decode("utf-8", errors="ignore")
+
+
+def split_table_name(full_table_name: str) -> Tuple[str, str]:
     """
-    Save Pandas DataFrame to PostgreSQL database, creating schema if needed.
-    Returns tuple of (success: bool, message: str)
+    Memisahkan 'schema.table' menjadi (schema, table). Default schema 'public'.
+    Nama dipotong seperti yang disimpan PostgreSQL agar cocok dengan pg_class.relname.
     """
-    if df.empty:
-        return False, "DataFrame kosong. Tidak ada yang disimpan ke database."
-
     if '.' in full_table_name:
         schema_name, table_name = full_table_name.split('.', 1)
     else:
         schema_name = 'public'
         table_name = full_table_name
+    return truncate_identifier(schema_name), truncate_identifier(table_name)
+
+
+def infer_column_types(df: pd.DataFrame) -> List[Tuple[str, str]]:
+    """Menentukan tipe kolom PostgreSQL satu kali dari dtype DataFrame."""
+    column_types = []
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            pg_type = "BOOLEAN"
+        elif pd.api.types.is_integer_dtype(dtype):
+            pg_type = "BIGINT"
+        elif pd.api.types.is_float_dtype(dtype):
+            pg_type = "DOUBLE PRECISION"
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            pg_type = "TIMESTAMP"
+        else:
+            pg_type = "TEXT"
+        column_types.append((str(col), pg_type))
+    return column_types
+
+
+def _staging_name(table_name: str) -> str:
+    if len(table_name.encode("utf-8")) + len(STAGING_SUFFIX) <= MAX_IDENTIFIER_LENGTH:
+        return f"{table_name}{STAGING_SUFFIX}"
+    # Nama panjang diberi hash agar staging tabel wide dan _cl yang dipotong tidak bertabrakan
+    digest = hashlib.sha1(table_name.encode("utf-8")).hexdigest()[:8]
+    prefix = truncate_identifier(table_name)[:MAX_IDENTIFIER_LENGTH - len(STAGING_SUFFIX) - len(digest) - 1]
+    return f"{prefix}_{digest}{STAGING_SUFFIX}"
+
+
+def _drop_relation(cursor, schema_name: str, name: str) -> None:
+    """DROP tabel atau view (tergantung jenis relasi yang ada) jika ada."""
+    cursor.execute(
+        "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = %s AND c.relname = %s",
+        (schema_name, name),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return
+    kind = {"v": "VIEW", "m": "MATERIALIZED VIEW"}.get(row[0], "TABLE")
+    cursor.execute(sql.SQL("DROP {} {}.{}").format(sql.SQL(kind), sql.Identifier(schema_name), sql.Identifier(name)))
+
+
+def normalized_table_names(cl_full_table_name: str) -> Dict[str, str]:
+    """Nama tabel dimensi, fakta, dan view untuk format long ter-normalisasi (maks. 63 karakter)."""
+    schema_name, cl_table = split_table_name(cl_full_table_name)
+    names = {"view": cl_table}
+    for key, suffix in (("kategori", "_kategori"), ("wilayah", "_wilayah"), ("fact", "_fakta")):
+        names[key] = f"{cl_table[:MAX_IDENTIFIER_LENGTH - len(STAGING_SUFFIX) - len(suffix)]}{suffix}"
+    return {key: f"{schema_name}.{name}" for key, name in names.items()}
+
+
+def copy_frame(cursor, df: pd.DataFrame, schema_name: str, table_name: str) -> None:
+    """
+    Membuat tabel baru dan mengisinya dengan COPY FROM STDIN dari buffer CSV di memori.
+    Tidak ada SQL per baris; NaN/None dikirim sebagai NULL.
+    """
+    column_types = infer_column_types(df)
+    columns_ddl = sql.SQL(", ").join(
+        sql.SQL("{} {}").format(sql.Identifier(col), sql.SQL(pg_type)) for col, pg_type in column_types
+    )
+    cursor.execute(sql.SQL("CREATE TABLE {}.{} ({})").format(
+        sql.Identifier(schema_name), sql.Identifier(table_name), columns_ddl
+    ))
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep='\\N')
+    buffer.seek(0)
+    copy_sql = sql.SQL("COPY {}.{} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')").format(
+        sql.Identifier(schema_name),
+        sql.Identifier(table_name),
+        sql.SQL(", ").join(sql.Identifier(col) for col, _ in column_types),
+    )
+    cursor.copy_expert(copy_sql.as_string(cursor), buffer)
+
+
+def bulk_load_postgres(df: pd.DataFrame, full_table_name: str) -> Tuple[bool, str]:
+    """
+    Memuat DataFrame ke tabel staging lewat COPY, lalu menukar staging menjadi tabel
+    utama (DROP + RENAME) dalam satu transaksi. Pembaca selalu melihat tabel lama
+    atau tabel baru yang sudah lengkap, tidak pernah tabel yang hilang / setengah terisi.
+    Returns tuple of (success: bool, message: str)
+    """
+    if df.empty:
+        return False, "DataFrame kosong. Tidak ada yang disimpan ke database."
+
+    schema_name, table_name = split_table_name(full_table_name)
+    staging_name = _staging_name(table_name)
+    print(f"Skema: '{schema_name}', Tabel: '{table_name}' (staging: '{staging_name}')")
+
+    try:
+        ensure_schema(schema_name)
+        with db_cursor() as cursor:
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}.{}").format(
+                sql.Identifier(schema_name), sql.Identifier(staging_name)
+            ))
+
+            print(f"Menulis {len(df)} baris ke staging '{schema_name}.{staging_name}' dengan COPY...")
+            copy_frame(cursor, df, schema_name, staging_name)
+
+            # Tabel lama bisa berupa view jika sebelumnya memakai format long ter-normalisasi
+            _drop_relation(cursor, schema_name, table_name)
+            cursor.execute(sql.SQL("ALTER TABLE {}.{} RENAME TO {}").format(
+                sql.Identifier(schema_name), sql.Identifier(staging_name), sql.Identifier(table_name)
+            ))
+        return True, f"Data berhasil disimpan ke PostgreSQL: {schema_name}.{table_name}"
+
+    except Exception as e:
+        return False, f"Terjadi kesalahan saat operasi database: {e}"
 
-    print(f"Skema: '{schema_name}', Tabel: '{table_name}'")
+
+def _unpivot_select(source_schema: str, source_table: str, df: pd.DataFrame, plan: Dict[str, Any],
+                    by_years: bool = False) -> sql.Composed:
+    """
+    SELECT set-based yang menghasilkan tabel long dari tabel wide di database:
+    CROSS JOIN LATERAL (VALUES ...) dengan urutan baris sama seperti pd.melt
+    (per kolom nilai, lalu per id). Jika ada kolom nilai bertipe TEXT, semua nilai
+    di-cast ke text seperti kolom 'jumlah' bertipe object hasil melt.
+    by_years=True menambahkan filter WHERE tahun = ANY(%s).
+    """
+    column_types = dict(infer_column_types(df))
+    as_text = any(column_types.get(col) == "TEXT" for col in plan["value_cols"])
+
+    def value_expr(col: str) -> sql.Composable:
+        value = sql.SQL("s.{}").format(sql.Identifier(col))
+        if not as_text or column_types.get(col) == "TEXT":
+            return value
+        if column_types.get(col) == "DOUBLE PRECISION":
+            # Sama dengan repr float Python di CSV: bilangan bulat ditulis '2000.0', bukan '2000'
+            return sql.SQL("CASE WHEN {v} = trunc({v}) AND abs({v}) < 1e16 "
+                           "THEN trunc({v})::bigint::text || '.0' ELSE {v}::text END").format(v=value)
+        return sql.SQL("{}::text").format(value)
+
+    values = sql.SQL(", ").join(
+        sql.SQL("({}, {}, {})").format(sql.Literal(ordinal), sql.Literal(col), value_expr(col))
+        for ordinal, col in enumerate(plan["value_cols"])
+    )
+    return sql.SQL(
+        "SELECT {id_cols}, v.{var_name}, v.{value_name} FROM {schema}.{table} AS s "
+        "CROSS JOIN LATERAL (VALUES {values}) AS v(ordinal, {var_name}, {value_name}){where} "
+        "ORDER BY v.ordinal, s.id"
+    ).format(
+        id_cols=sql.SQL(", ").join(sql.SQL("s.{}").format(sql.Identifier(col)) for col in plan["id_cols"]),
+        var_name=sql.Identifier(plan["var_name"]),
+        value_name=sql.Identifier(plan["value_name"]),
+        schema=sql.Identifier(source_schema),
+        table=sql.Identifier(source_table),
+        values=values,
+        where=sql.SQL(" WHERE s.tahun = ANY(%s)") if by_years else sql.SQL(""),
+    )
+
+
+def bulk_load_with_unpivot(df: pd.DataFrame, full_table_name: str, plan: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    Memuat hanya tabel wide lewat COPY, lalu membangun tabel long plan['table'] di PostgreSQL
+    (unpivot set-based) dan menukar keduanya dalam satu transaksi: tabel wide dan _cl
+    selalu konsisten, dan frame long tidak pernah dibuat di memori klien.
+    Returns tuple of (success: bool, message: str)
+    """
+    if df.empty:
+        return False, "DataFrame kosong. Tidak ada yang disimpan ke database."
+
+    schema_name, table_name = split_table_name(full_table_name)
+    cl_schema, cl_table = split_table_name(plan["table"])
+    staging_name = _staging_name(table_name)
+    cl_staging_name = _staging_name(cl_table)
 
     try:
-        conn_str_psycopg = f"dbname='{DB_CONFIG['dbname']}' user='{DB_CONFIG['user']}' password='{DB_CONFIG['password']}' host='{DB_CONFIG['host']}' port='{DB_CONFIG['port']}'"
-        with psycopg2.connect(conn_str_psycopg) as conn:
-            with conn.cursor() as cursor:
-                print(f"Memastikan skema '{schema_name}' ada...")
-                cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name};")
-        print(f"✅ Skema '{schema_name}' siap.")
+        ensure_schema(schema_name)
+        ensure_schema(cl_schema)
+        with db_cursor() as cursor:
+            for schema, name in ((schema_name, staging_name), (cl_schema, cl_staging_name)):
+                cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}.{}").format(sql.Identifier(schema), sql.Identifier(name)))
+
+            print(f"Menulis {len(df)} baris ke staging '{schema_name}.{staging_name}' dengan COPY...")
+            copy_frame(cursor, df, schema_name, staging_name)
+
+            print(f"Membangun '{cl_schema}.{cl_table}' dengan unpivot di database ({len(plan['value_cols'])} kolom nilai)...")
+            cursor.execute(sql.SQL("CREATE TABLE {}.{} AS ").format(
+                sql.Identifier(cl_schema), sql.Identifier(cl_staging_name)
+            ) + _unpivot_select(schema_name, staging_name, df, plan))
+
+            for schema, live, staging in ((schema_name, table_name, staging_name), (cl_schema, cl_table, cl_staging_name)):
+                _drop_relation(cursor, schema, live)
+                cursor.execute(sql.SQL("ALTER TABLE {}.{} RENAME TO {}").format(
+                    sql.Identifier(schema), sql.Identifier(staging), sql.Identifier(live)
+                ))
+        return True, f"Data berhasil disimpan ke PostgreSQL: {schema_name}.{table_name} dan {cl_schema}.{cl_table}"
 
-        conn_str_sqlalchemy = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}"
-        engine = create_engine(conn_str_sqlalchemy)
+    except Exception as e:
+        return False, f"Terjadi kesalahan saat operasi database: {e}"
+
+
+def _create_normalized_view(cursor, names: Dict[str, str], plan: Dict[str, Any]) -> None:
+    """View {table}_cl dengan kolom dan urutan yang sama seperti tabel long hasil melt."""
+    schema_name, view_name = split_table_name(names["view"])
+    label_col = plan["id_cols"][3]
+    cursor.execute(sql.SQL(
+        "CREATE VIEW {schema}.{view} AS "
+        "SELECT f.id, f.id_kategori, f.tahun, w.{label}, k.{var_name}, f.{value_name} "
+        "FROM {fact} AS f JOIN {wilayah} AS w ON w.label_id = f.label_id "
+        "JOIN {kategori} AS k ON k.kategori_id = f.kategori_id"
+    ).format(
+        schema=sql.Identifier(schema_name),
+        view=sql.Identifier(view_name),
+        label=sql.Identifier(label_col),
+        var_name=sql.Identifier(plan["var_name"]),
+        value_name=sql.Identifier(plan["value_name"]),
+        **{key: sql.SQL("{}.{}").format(*map(sql.Identifier, split_table_name(names[key])))
+           for key in ("fact", "wilayah", "kategori")},
+    ))
+
+
+def bulk_load_normalized(df: pd.DataFrame, full_table_name: str, frames: Dict[str, pd.DataFrame],
+                         plan: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    Memuat tabel wide, dimensi kategori/wilayah, dan tabel fakta berkode integer lewat COPY ke
+    staging, lalu menukar semuanya dan membuat ulang view {table}_cl dalam satu transaksi.
+    Returns tuple of (success: bool, message: str)
+    """
+    if df.empty:
+        return False, "DataFrame kosong. Tidak ada yang disimpan ke database."
+
+    names = normalized_table_names(plan["table"])
+    loads = [(df, full_table_name)] + [(frames[key], names[key]) for key in ("kategori", "wilayah", "fact")]
+
+    try:
+        for _, name in loads:
+            ensure_schema(split_table_name(name)[0])
+        with db_cursor() as cursor:
+            for frame, name in loads:
+                schema_name, table_name = split_table_name(name)
+                staging_name = _staging_name(table_name)
+                cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}.{}").format(
+                    sql.Identifier(schema_name), sql.Identifier(staging_name)
+                ))
+                print(f"Menulis {len(frame)} baris ke staging '{schema_name}.{staging_name}' dengan COPY...")
+                copy_frame(cursor, frame, schema_name, staging_name)
+
+            # View bergantung pada tabel fakta/dimensi, jadi dilepas dulu sebelum tabel ditukar
+            _drop_relation(cursor, *split_table_name(names["view"]))
+            for _, name in loads:
+                schema_name, table_name = split_table_name(name)
+                _drop_relation(cursor, schema_name, table_name)
+                cursor.execute(sql.SQL("ALTER TABLE {}.{} RENAME TO {}").format(
+                    sql.Identifier(schema_name), sql.Identifier(_staging_name(table_name)), sql.Identifier(table_name)
+                ))
+
+            for key, id_col, natural_col in (("kategori", "kategori_id", plan["var_name"]),
+                                             ("wilayah", "label_id", plan["id_cols"][3])):
+                schema_name, table_name = split_table_name(names[key])
+                cursor.execute(sql.SQL("ALTER TABLE {}.{} ADD PRIMARY KEY ({}), ADD UNIQUE ({})").format(
+                    sql.Identifier(schema_name), sql.Identifier(table_name),
+                    sql.Identifier(id_col), sql.Identifier(natural_col)
+                ))
+            _create_normalized_view(cursor, names, plan)
+
+        tables = ", ".join(name for _, name in loads)
+        return True, f"Data berhasil disimpan ke PostgreSQL: {tables} (view {names['view']})"
+
+    except Exception as e:
+        return False, f"Terjadi kesalahan saat operasi database: {e}"
+
+
+def _upsert_normalized(cursor, frames: Dict[str, pd.DataFrame], plan: Dict[str, Any], id_offset: int,
+                       years: List[int]) -> None:
+    """
+    Bagian incremental format ter-normalisasi: dimensi baru ditambahkan dengan id lanjutan
+    (kunci alami = teks kategori / label), lalu baris fakta tahun tersebut diganti.
+    Kode lokal di frame dipetakan ke id dimensi yang tersimpan lewat join di database.
+    """
+    names = normalized_table_names(plan["table"])
+    dims = (("kategori", "kategori_id", plan["var_name"]), ("wilayah", "label_id", plan["id_cols"][3]))
+
+    for key, frame in (("kategori", frames["kategori"]), ("wilayah", frames["wilayah"]), ("fact", frames["fact"])):
+        cursor.execute(sql.SQL("DROP TABLE IF EXISTS pg_temp.{}").format(sql.Identifier(f"new_{key}")))
+        copy_frame(cursor, frame, "pg_temp", f"new_{key}")
+
+    for key, id_col, natural_col in dims:
+        schema_name, table_name = split_table_name(names[key])
+        cursor.execute(sql.SQL(
+            "INSERT INTO {schema}.{table} ({id_col}, {natural}) "
+            "SELECT (SELECT COALESCE(MAX({id_col}), 0) FROM {schema}.{table}) + row_number() OVER (ORDER BY n.{id_col}), "
+            "n.{natural} FROM pg_temp.{temp} AS n "
+            "WHERE NOT EXISTS (SELECT 1 FROM {schema}.{table} AS d WHERE d.{natural} = n.{natural})"
+        ).format(
+            schema=sql.Identifier(schema_name), table=sql.Identifier(table_name),
+            id_col=sql.Identifier(id_col), natural=sql.Identifier(natural_col), temp=sql.Identifier(f"new_{key}"),
+        ))
+
+    fact_schema, fact_table = split_table_name(names["fact"])
+    (kat_schema, kat_table), (wil_schema, wil_table) = split_table_name(names["kategori"]), split_table_name(names["wilayah"])
+    cursor.execute(sql.SQL("DELETE FROM {}.{} WHERE tahun = ANY(%s)").format(
+        sql.Identifier(fact_schema), sql.Identifier(fact_table)
+    ), (years,))
+    cursor.execute(sql.SQL(
+        "INSERT INTO {fact_schema}.{fact} (id, id_kategori, tahun, label_id, kategori_id, {value_name}) "
+        "SELECT f.id + %s, f.id_kategori, f.tahun, w.label_id, k.kategori_id, f.{value_name} "
+        "FROM pg_temp.new_fact AS f "
+        "JOIN pg_temp.new_wilayah AS nw ON nw.label_id = f.label_id "
+        "JOIN {wil_schema}.{wil} AS w ON w.{label} = nw.{label} "
+        "JOIN pg_temp.new_kategori AS nk ON nk.kategori_id = f.kategori_id "
+        "JOIN {kat_schema}.{kat} AS k ON k.{var_name} = nk.{var_name} "
+        "ORDER BY f.kategori_id, f.id"
+    ).format(
+        fact_schema=sql.Identifier(fact_schema), fact=sql.Identifier(fact_table),
+        wil_schema=sql.Identifier(wil_schema), wil=sql.Identifier(wil_table),
+        kat_schema=sql.Identifier(kat_schema), kat=sql.Identifier(kat_table),
+        label=sql.Identifier(plan["id_cols"][3]), var_name=sql.Identifier(plan["var_name"]),
+        value_name=sql.Identifier(plan["value_name"]),
+    ), (id_offset,))
+
+    for key in ("kategori", "wilayah", "fact"):
+        cursor.execute(sql.SQL("DROP TABLE pg_temp.{}").format(sql.Identifier(f"new_{key}")))
+    print(f"✅ Upsert {len(frames['fact'])} baris fakta ke '{names['fact']}' untuk tahun {years}.")
+
+
+def _ensure_state_table(cursor, schema_name: str) -> None:
+    # Dikunci per skema: task paralel bisa membuat tabel state yang sama bersamaan
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"{schema_name}.{LOAD_STATE_TABLE}",))
+    cursor.execute(sql.SQL(
+        "CREATE TABLE IF NOT EXISTS {}.{} ("
+        "table_name TEXT NOT NULL, tahun INTEGER NOT NULL, fingerprint TEXT NOT NULL, "
+        "loaded_at TIMESTAMPTZ NOT NULL DEFAULT now(), PRIMARY KEY (table_name, tahun))"
+    ).format(sql.Identifier(schema_name), sql.Identifier(LOAD_STATE_TABLE)))
+
+
+def load_state(full_table_name: str) -> Dict[int, str]:
+    """Mengambil fingerprint per tahun yang terakhir dimuat untuk sebuah tabel."""
+    schema_name, _ = split_table_name(full_table_name)
+    ensure_schema(schema_name)
+    with db_cursor() as cursor:
+        _ensure_state_table(cursor, schema_name)
+        cursor.execute(sql.SQL("SELECT tahun, fingerprint FROM {}.{} WHERE table_name = %s").format(
+            sql.Identifier(schema_name), sql.Identifier(LOAD_STATE_TABLE)
+        ), (full_table_name,))
+        return {int(tahun): fingerprint for tahun, fingerprint in cursor.fetchall()}
+
+
+def save_load_state(full_table_name: str, fingerprints: Dict[int, str], replace: bool = False) -> None:
+    """
+    Menyimpan (upsert) fingerprint per tahun setelah data berhasil dimuat.
+    replace=True (setelah full replace) juga menghapus fingerprint tahun yang tidak
+    ada lagi di tabel, dalam transaksi yang sama, agar load incremental berikutnya
+    memuat ulang tahun tersebut begitu tersedia lagi.
+    """
+    if not fingerprints and not replace:
+        return
+    schema_name, _ = split_table_name(full_table_name)
+    ensure_schema(schema_name)
+    with db_cursor() as cursor:
+        _ensure_state_table(cursor, schema_name)
+        if replace:
+            cursor.execute(sql.SQL("DELETE FROM {}.{} WHERE table_name = %s AND NOT (tahun = ANY(%s))").format(
+                sql.Identifier(schema_name), sql.Identifier(LOAD_STATE_TABLE)
+            ), (full_table_name, [int(tahun) for tahun in fingerprints]))
+        if fingerprints:
+            cursor.executemany(sql.SQL(
+                "INSERT INTO {}.{} (table_name, tahun, fingerprint, loaded_at) VALUES (%s, %s, %s, now()) "
+                "ON CONFLICT (table_name, tahun) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, loaded_at = now()"
+            ).format(sql.Identifier(schema_name), sql.Identifier(LOAD_STATE_TABLE)).as_string(cursor),
+                [(full_table_name, int(tahun), fingerprint) for tahun, fingerprint in fingerprints.items()])
+
+
+def get_table_columns(full_table_name: str) -> Optional[List[str]]:
+    """Daftar kolom tabel yang sudah ada di database, atau None jika tabel belum ada."""
+    schema_name, table_name = split_table_name(full_table_name)
+    with db_cursor() as cursor:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position",
+            (schema_name, table_name),
+        )
+        columns = [row[0] for row in cursor.fetchall()]
+    return columns or None
+
+
+def upsert_year_slices(slices: List[Tuple[pd.DataFrame, str]],
+                       unpivot_plan: Optional[Dict[str, Any]] = None,
+                       normalized: Optional[Dict[str, pd.DataFrame]] = None) -> Tuple[bool, str]:
+    """
+    Mengganti irisan (label, tahun) untuk tahun-tahun yang ada di setiap DataFrame,
+    untuk semua tabel dalam satu transaksi. Baris tahun tersebut dihapus lalu diisi
+    ulang dari staging (COPY), sehingga label yang hilang dari tahun itu ikut terhapus.
+    Kolom 'id' di-offset dengan MAX(id) tabel pertama agar tetap unik.
+    Dengan unpivot_plan, baris tahun tersebut di tabel _cl dibangun ulang dari tabel
+    pertama (wide) di database, masih dalam transaksi yang sama. Dengan normalized
+    (frame dari normalize_long), tabel fakta/dimensi yang diperbarui (view _cl tetap).
+    Returns tuple of (success: bool, message: str)
+    """
+    slices = [(df, name) for df, name in slices if df is not None and not df.empty]
+    if not slices:
+        return False, "DataFrame kosong. Tidak ada yang disimpan ke database."
+
+    try:
+        with db_cursor() as cursor:
+            first_schema, first_table = split_table_name(slices[0][1])
+            cursor.execute(sql.SQL("SELECT COALESCE(MAX(id), 0) FROM {}.{}").format(
+                sql.Identifier(first_schema), sql.Identifier(first_table)
+            ))
+            id_offset = cursor.fetchone()[0]
+
+            for df, full_table_name in slices:
+                schema_name, table_name = split_table_name(full_table_name)
+                staging_name = _staging_name(table_name)
+                columns = sql.SQL(", ").join(sql.Identifier(str(col)) for col in df.columns)
+
+                cursor.execute(sql.SQL("DROP TABLE IF EXISTS pg_temp.{}").format(sql.Identifier(staging_name)))
+                copy_frame(cursor, df, "pg_temp", staging_name)
+                if 'id' in df.columns:
+                    cursor.execute(sql.SQL("UPDATE pg_temp.{} SET id = id + %s").format(
+                        sql.Identifier(staging_name)
+                    ), (id_offset,))
+
+                cursor.execute(sql.SQL("DELETE FROM {}.{} WHERE tahun IN (SELECT DISTINCT tahun FROM pg_temp.{})").format(
+                    sql.Identifier(schema_name), sql.Identifier(table_name), sql.Identifier(staging_name)
+                ))
+                cursor.execute(sql.SQL("INSERT INTO {}.{} ({}) SELECT {} FROM pg_temp.{}").format(
+                    sql.Identifier(schema_name), sql.Identifier(table_name), columns, columns,
+                    sql.Identifier(staging_name)
+                ))
+                cursor.execute(sql.SQL("DROP TABLE pg_temp.{}").format(sql.Identifier(staging_name)))
+                print(f"✅ Upsert {len(df)} baris ke '{schema_name}.{table_name}'.")
+
+            if normalized is not None:
+                years = [int(tahun) for tahun in pd.unique(slices[0][0]['tahun'])]
+                _upsert_normalized(cursor, normalized, unpivot_plan, id_offset, years)
+                slices = slices + [(None, normalized_table_names(unpivot_plan["table"])["fact"])]
+            elif unpivot_plan is not None:
+                wide_df, wide_name = slices[0]
+                years = [int(tahun) for tahun in pd.unique(wide_df['tahun'])]
+                cl_schema, cl_table = split_table_name(unpivot_plan["table"])
+                cl_columns = sql.SQL(", ").join(sql.Identifier(col) for col in (
+                    unpivot_plan["id_cols"] + [unpivot_plan["var_name"], unpivot_plan["value_name"]]
+                ))
+                cursor.execute(sql.SQL("DELETE FROM {}.{} WHERE tahun = ANY(%s)").format(
+                    sql.Identifier(cl_schema), sql.Identifier(cl_table)
+                ), (years,))
+                cursor.execute(sql.SQL("INSERT INTO {}.{} ({}) ").format(
+                    sql.Identifier(cl_schema), sql.Identifier(cl_table), cl_columns
+                ) + _unpivot_select(first_schema, first_table, wide_df, unpivot_plan, by_years=True), (years,))
+                print(f"✅ Unpivot di database untuk tahun {years} ke '{cl_schema}.{cl_table}'.")
+                slices = slices + [(None, unpivot_plan["table"])]
+
+        tables = ", ".join(name for _, name in slices)
+        return True, f"Data incremental berhasil disimpan ke PostgreSQL: {tables}"
+
+    except Exception as e:
+        return False, f"Terjadi kesalahan saat operasi database: {e}"
+
+
+def save_to_postgres(df: pd.DataFrame, full_table_name: str, method: str = 'copy') -> Tuple[bool, str]:
+    """
+    Save Pandas DataFrame to PostgreSQL database, creating schema if needed.
+    method='copy' (default) memakai bulk_load_postgres; method='to_sql' memakai
+    df.to_sql seperti sebelumnya.
+    Returns tuple of (success: bool, message: str)
+    """
+    if method == 'copy':
+        return bulk_load_postgres(df, full_table_name)
+
+    if df.empty:
+        return False, "DataFrame kosong. Tidak ada yang disimpan ke database."
+
+    schema_name, table_name = split_table_name(full_table_name)
+
+    print(f"Skema: '{schema_name}', Tabel: '{table_name}'")
+
+    try:
+        ensure_schema(schema_name)
 
         print(f"Menulis data ke tabel '{schema_name}.{table_name}'...")
-        df.to_sql(table_name, engine, schema=schema_name, if_exists='replace', index=False)
+        df.to_sql(table_name, get_engine(), schema=schema_name, if_exists='replace', index=False)
         return True, f"Data berhasil disimpan ke PostgreSQL: {schema_name}.{table_name}"
 
     except Exception as e:
         return False, f"Terjadi kesalahan saat operasi database: {e}"
-    finally:
-        if 'engine' in locals():
-            engine.dispose()
\ No newline at end of file
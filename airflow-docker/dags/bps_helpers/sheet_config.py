@@ -0,0 +1,108 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional
+from bps_helpers.config.settings import DATA_DIR, SHEET_CSV_URL, SHEET_SNAPSHOT_TTL, HTTP_TIMEOUT
+from bps_helpers.file_utils import atomic_write
+
+# Snapshot lokal konfigurasi pipeline. DAG hanya membaca file ini saat parsing;
+# pembaruan dari Google Sheets dilakukan di luar parsing (task refresh / CLI).
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "sheet_config.json")
+
+
+def parse_sheet_csv(csv_text: str) -> List[Dict[str, Any]]:
+    """
+    Mengubah CSV Google Sheet menjadi list konfigurasi.
+    Kolom A = url, B = schema, C = table, D = flag perkalian ('X' berarti True),
+    E = spesifikasi transformasi JSON (opsional, lihat transform_spec).
+    Baris tanpa url diabaikan.
+    """
+    records = []
+    for row in csv.reader(io.StringIO(csv_text)):
+        row = row + [""] * (5 - len(row))
+        url = row[0].strip()
+        if not url:
+            continue
+        records.append({
+            "url": url,
+            "schema": row[1].strip() or None,
+            "table": row[2].strip() or None,
+            "multiply_flag": row[3].strip().upper() == "X",
+            "transform": row[4].strip() or None,
+        })
+    return records
+
+
+def load_sheet_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Dict[str, Any]]:
+    """Membaca snapshot lokal (tanpa akses jaringan). None jika belum ada / rusak."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(snapshot: Dict[str, Any], path: str) -> None:
+    atomic_write(path, json.dumps(snapshot, ensure_ascii=False, indent=2))
+
+
+def refresh_sheet_snapshot(force: bool = False, path: str = SNAPSHOT_PATH) -> Dict[str, Any]:
+    """
+    Memperbarui snapshot dari Google Sheets bila TTL habis (atau force=True).
+    Memakai ETag (If-None-Match) dan hash isi CSV: versi hanya naik jika isi sheet berubah.
+    Jika sheet tidak bisa diakses, snapshot lama tetap dipakai.
+    """
+    snapshot = load_sheet_snapshot(path) or {}
+    now = time.time()
+
+    if snapshot and not force and now - snapshot.get("checked_at", 0) < SHEET_SNAPSHOT_TTL:
+        print(f"ℹ️ Snapshot sheet masih segar (versi {snapshot.get('version')}), tidak dicek ulang.")
+        return snapshot
+
+    request = urllib.request.Request(SHEET_CSV_URL)
+    if snapshot.get("etag") and not force:
+        request.add_header("If-None-Match", snapshot["etag"])
+
+    try:
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+            csv_text = response.read().decode("utf-8")
+            etag = response.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and snapshot:
+            print(f"✅ Sheet tidak berubah (ETag sama), versi {snapshot.get('version')}.")
+            snapshot["checked_at"] = now
+            _write_snapshot(snapshot, path)
+            return snapshot
+        print(f"❌ Gagal ambil dari Google Sheet: {e}")
+        return snapshot
+    except (urllib.error.URLError, OSError) as e:
+        print(f"❌ Gagal ambil dari Google Sheet: {e}")
+        return snapshot
+
+    content_hash = hashlib.sha256(csv_text.encode("utf-8")).hexdigest()
+    if snapshot and snapshot.get("content_hash") == content_hash:
+        print(f"✅ Isi sheet tidak berubah, versi {snapshot.get('version')}.")
+    else:
+        snapshot = {
+            "version": snapshot.get("version", 0) + 1,
+            "content_hash": content_hash,
+            "fetched_at": now,
+            "records": parse_sheet_csv(csv_text),
+        }
+        print(f"✅ Snapshot sheet diperbarui ke versi {snapshot['version']} ({len(snapshot['records'])} baris).")
+
+    snapshot["etag"] = etag
+    snapshot["checked_at"] = now
+    _write_snapshot(snapshot, path)
+    return snapshot
+
+
+if __name__ == "__main__":
+    # python -m bps_helpers.sheet_config [--force]
+    refresh_sheet_snapshot(force="--force" in sys.argv[1:])
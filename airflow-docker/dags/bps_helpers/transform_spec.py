@@ -0,0 +1,149 @@
+import fnmatch
+import json
+import operator
+from typing import Any, Callable, Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+from bps_helpers.get_data_simdasi import normalize_column_name
+
+# Spesifikasi transformasi per tabel dari kolom E Google Sheet (JSON), contoh:
+#   {"filter": [{"column": "tahun", "op": ">=", "value": 2015}],
+#    "select": ["jumlah_penduduk", "luas_*"],
+#    "scale": {"jumlah_penduduk": 1000},
+#    "rename": {"luas_km2": "luas"}}
+# Nama kolom memakai nama yang sudah dinormalisasi (seperti di tabel original); "label"
+# merujuk ke kolom label wilayah. Urutan eksekusi selalu filter -> select -> scale -> rename,
+# dan transformasi diterapkan sekali ke frame wide sebelum transpose.
+
+# Kolom kunci di frame wide: id, id_kategori, label, tahun. Kolom nilai mulai index ini.
+KEY_COLUMN_COUNT = 4
+# Flag 'X' di kolom D sama dengan {"scale": 1000} untuk semua kolom nilai
+MULTIPLY_FLAG_FACTOR = 1000
+SPEC_KEYS = ("filter", "select", "scale", "rename")
+
+_FILTER_OPS: Dict[str, Callable[[pd.Series, Any], pd.Series]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": lambda series, value: series.isin(value),
+    "not in": lambda series, value: ~series.isin(value),
+}
+
+Transform = Callable[[pd.DataFrame], pd.DataFrame]
+
+
+def parse_spec(spec: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """Mengubah teks JSON kolom E menjadi dict dan memvalidasi kuncinya."""
+    if spec is None or (isinstance(spec, str) and not spec.strip()):
+        return {}
+    if isinstance(spec, str):
+        try:
+            spec = json.loads(spec)
+        except ValueError as e:
+            raise ValueError(f"Spesifikasi transformasi bukan JSON yang valid: {e}") from e
+    if not isinstance(spec, dict):
+        raise ValueError("Spesifikasi transformasi harus berupa objek JSON.")
+    unknown = set(spec) - set(SPEC_KEYS)
+    if unknown:
+        raise ValueError(f"Kunci transformasi tidak dikenal: {sorted(unknown)} (yang didukung: {list(SPEC_KEYS)})")
+    return spec
+
+
+def _match(patterns: List[str], columns: List[str]) -> List[str]:
+    """Kolom yang cocok dengan pola (nama persis atau glob seperti 'luas_*'), urut sesuai pola."""
+    matched = []
+    for pattern in patterns:
+        hits = [col for col in columns if fnmatch.fnmatchcase(col, pattern)]
+        if not hits:
+            raise ValueError(f"Kolom '{pattern}' tidak ditemukan. Kolom yang tersedia: {columns}")
+        matched.extend(col for col in hits if col not in matched)
+    return matched
+
+
+def _resolve(column: str, key_columns: List[str]) -> str:
+    return key_columns[2] if column == "label" else column
+
+
+def compile_transform(spec: Union[str, Dict[str, Any], None], multiply_flag: bool = False) -> Optional[Transform]:
+    """
+    Mengompilasi spesifikasi sekali menjadi satu fungsi df -> df yang memakai operasi
+    vektor pandas/NumPy. Mengembalikan None jika tidak ada transformasi sama sekali.
+    Kesalahan spesifikasi dilaporkan sebagai ValueError (sebelum data diambil).
+    """
+    spec = parse_spec(spec)
+
+    filters = spec.get("filter", [])
+    if isinstance(filters, dict):
+        filters = [filters]
+    for condition in filters:
+        if not isinstance(condition, dict) or "column" not in condition or condition.get("op", "==") not in _FILTER_OPS:
+            raise ValueError(f"Filter tidak valid: {condition}. Format: {{'column', 'op' ({list(_FILTER_OPS)}), 'value'}}")
+
+    select = spec.get("select")
+    if select is not None and not (isinstance(select, list) and all(isinstance(c, str) for c in select)):
+        raise ValueError("'select' harus berupa list nama kolom.")
+
+    scale = spec.get("scale")
+    if isinstance(scale, (int, float)) and not isinstance(scale, bool):
+        scale = {"*": scale}
+    if scale is not None and not (isinstance(scale, dict) and all(
+            isinstance(f, (int, float)) and not isinstance(f, bool) for f in scale.values())):
+        raise ValueError("'scale' harus berupa angka atau objek {kolom: faktor}.")
+    scale = dict(scale or {})
+    if multiply_flag:
+        # Hanya pola "*" yang dikalikan: setiap kolom nilai cocok dengan "*" tepat sekali,
+        # jadi faktor flag diterapkan sekali per kolom di atas faktor per kolom
+        scale["*"] = scale.get("*", 1) * MULTIPLY_FLAG_FACTOR
+
+    rename = spec.get("rename", {})
+    if not (isinstance(rename, dict) and all(isinstance(v, str) and v for v in rename.values())):
+        raise ValueError("'rename' harus berupa objek {kolom_lama: kolom_baru}.")
+
+    if not (filters or select or scale or rename):
+        return None
+
+    def transform(df: pd.DataFrame) -> pd.DataFrame:
+        key_columns = list(df.columns[:KEY_COLUMN_COUNT])
+        value_columns = list(df.columns[KEY_COLUMN_COUNT:])
+
+        if filters:
+            mask = np.ones(len(df), dtype=bool)
+            for condition in filters:
+                column = _resolve(condition["column"], key_columns)
+                if column not in df.columns:
+                    raise ValueError(f"Kolom filter '{condition['column']}' tidak ditemukan.")
+                mask &= _FILTER_OPS[condition.get("op", "==")](df[column], condition.get("value")).to_numpy(dtype=bool)
+            if not mask.all():
+                df = df.loc[mask].reset_index(drop=True)
+
+        if select is not None:
+            value_columns = _match(select, value_columns)
+            df = df[key_columns + value_columns]
+
+        if scale:
+            # Faktor per kolom dikumpulkan dulu: kolom yang cocok dengan beberapa pola dikalikan sekali
+            factors = {}
+            for pattern, factor in scale.items():
+                for col in (value_columns if pattern == "*" else _match([pattern], value_columns)):
+                    factors[col] = factors.get(col, 1) * factor
+            scaled = {
+                col: (df[col] if pd.api.types.is_float_dtype(df[col]) else pd.to_numeric(df[col], errors='coerce')) * factor
+                for col, factor in factors.items()
+            }
+            df = df.assign(**scaled)
+
+        if rename:
+            targets = {}
+            for source, target in rename.items():
+                for col in _match([source], value_columns):
+                    targets[col] = normalize_column_name(target)
+            df = df.rename(columns=targets)
+            if df.columns.duplicated().any():
+                raise ValueError(f"Rename menghasilkan nama kolom ganda: {list(df.columns)}")
+
+        return df
+
+    return transform
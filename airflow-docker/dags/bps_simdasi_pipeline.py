@@ -1,3 +1,6 @@
+import time
+_PARSE_START = time.perf_counter()
+
 from datetime import datetime, timedelta
 from airflow import DAG
 # from airflow.operators.python import PythonOperator
@@ -6,15 +9,12 @@ from airflow.providers.standard.operators.python import PythonOperator
 from airflow.sdk import TaskGroup
 # from airflow.decorators import dag, task
 from airflow.sdk import task, dag
-from airflow.exceptions import AirflowSkipException 
-
-import pandas as pd
-import numpy as np
-from bps_helpers.config.db_config import DB_CONFIG
-from bps_helpers.get_data_simdasi import handle_simdasi_detail_table
-from bps_helpers.save_data_simdasi import save_to_postgres
+from airflow.exceptions import AirflowException, AirflowSkipException 
 
-CSV_URL = "https://docs.google.com/spreadsheets/d/1hJ02dmxIVXZd7_i0ue3SvurxKNUPDvpKQqT5PSmJ_2g/gviz/tq?tqx=out:csv&gid=1551122677"
+# Saat parsing hanya konfigurasi ringan (stdlib) yang di-import.
+# pandas, numpy, requests, psycopg2, dan SQLAlchemy di-import di dalam task
+# (cek: python benchmarks/check_import_budget.py).
+from bps_helpers.config.settings import SIMDASI_POOL, SIMDASI_MAX_PARALLEL, UNPIVOT_MODE, LONG_FORMAT, REPLAY_MODE
 
 default_args = {
     'owner': 'airflow',
@@ -26,86 +26,33 @@ default_args = {
 
 def get_api_urls_from_sheet():
     """
-    Fetch API URLs from Google Sheets.
-    Juga membaca kolom D untuk flag perkalian.
+    Membaca daftar API URL dari snapshot lokal Google Sheet (tanpa akses jaringan).
+    Snapshot diperbarui oleh task 'refresh_sheet_config' atau
+    `python -m bps_helpers.sheet_config`.
     """
-    try:
-        df = pd.read_csv(CSV_URL, header=None)
-        #Tambahkan 'X' untuk flag perkalian (kolom D)
-        df = df.rename(columns={
-            df.columns[0]: "url",
-            df.columns[1]: "schema",
-            df.columns[2]: "table",
-            df.columns[3]: "multiply_flag" 
-        })
-        
-        # Pastikan kolom flag ada, jika tidak, buat kolom kosong
-        if 'multiply_flag' not in df.columns:
-            df['multiply_flag'] = np.nan
-            
-        # Ubah flag menjadi boolean, anggap 'X' (case-insensitive) berarti True
-        df['multiply_flag'] = df['multiply_flag'].str.strip().str.upper() == 'X'
-        
-        records = df.dropna(subset=["url"]).to_dict(orient="records")
-        return records
-    except Exception as e:
-        print(f"❌ Gagal ambil dari Google Sheet: {e}")
+    from bps_helpers.sheet_config import load_sheet_snapshot
+
+    snapshot = load_sheet_snapshot()
+    if not snapshot:
+        print("⚠️ Snapshot Google Sheet belum ada. Jalankan task 'refresh_sheet_config' terlebih dahulu.")
         return []
+    print(f"📄 Memakai snapshot sheet versi {snapshot.get('version')} ({len(snapshot.get('records', []))} baris).")
+    return snapshot.get("records", [])
 
 #parameter 'multiply' pada fungsi
-def process_simdasi_url(url: str, schema: str, table: str, multiply: bool = False):
+def process_simdasi_url(url: str, schema: str, table: str, multiply: bool = False, mode: str = 'incremental', replay: bool = False, transform: str = None, unpivot: str = UNPIVOT_MODE, long_format: str = LONG_FORMAT, ti=None):
     """
-    Memanggil helper untuk mengambil data, lalu menerapkan logika perkalian
-    pada kolom ke-5 dan seterusnya.
+    Callable task 'process_api'. Implementasinya ada di bps_helpers.pipeline
+    dan baru di-import saat task berjalan agar parsing DAG tetap cepat.
     """
-    print(f"🔁 Processing URL: {url}")
-    # Memanggil fungsi dari file get_simdasi.py
-    result = handle_simdasi_detail_table(url, schema, table)
+    from bps_helpers.pipeline import process_simdasi_url as run_pipeline
 
-    if result is None:
-        print("⚠️ No data processed from helper")
-        return
-
-    # mengalikan kolom berdasarkan posisinya
-    if multiply:
-        print(f"🔎 Menerapkan perkalian 1000 pada data dari {url}...")
-        
-        # Proses untuk original_df
-        if result.get("original_df") is not None and not result["original_df"].empty:
-            df_orig = result["original_df"]
-            cols_to_multiply = df_orig.columns[4:] #Mulai dari index 4
-            print(f"✅ Mengalikan kolom di original_df: {cols_to_multiply.tolist()}")
-            for col in cols_to_multiply:
-                #pastikan kolom adalah numerik sebelum dikalikan
-                df_orig[col] = pd.to_numeric(df_orig[col], errors='coerce') * 1000
-            result["original_df"] = df_orig
-
-        # Cek dan kalikan di transposed_df (jika ada)
-        if result.get("transposed_df") is not None and not result["transposed_df"].empty:
-            df_trans = result["transposed_df"]
-            cols_to_multiply = df_trans.columns[5:] # <-- Aturan 2: Mulai dari index 5
-            print(f"✅ Mengalikan kolom di transposed_df: {cols_to_multiply.tolist()}")
-            for col in cols_to_multiply:
-                # Pastikan kolom adalah numerik sebelum dikalikan
-                df_trans[col] = pd.to_numeric(df_trans[col], errors='coerce') * 1000
-            result["transposed_df"] = df_trans
-    
-    #Menyimpan data yang sudah (atau tidak) dimodifikasi ke database
-    full_table_original = f"{schema}.{table}"
-    full_table_transposed = f"{schema}.{table}_cl"
-
-    if result["original_df"] is not None and not result["original_df"].empty:
-        success, message = save_to_postgres(result["original_df"], full_table_original)
-        print(f"{'✅YEY BISA' if success else '❌YAH GABISA'} {message}")
-    else:
-        print("⚠️ No original data to save")
-
-    # Save transposed data
-    if result["transposed_df"] is not None and not result["transposed_df"].empty:
-        success, message = save_to_postgres(result["transposed_df"], full_table_transposed)
-        print(f"{'✅CONGRATS' if success else '❌YAH GABISA'} {message}")
-    else:
-        print("⚠️ No transposed data to save")
+    summary = run_pipeline(url, schema, table, multiply=multiply, mode=mode, replay=replay, transform=transform,
+                           unpivot=unpivot, long_format=long_format, ti=ti)
+    if not summary.get("success", True):
+        # Gagalkan task instance agar di-retry dan terlihat merah, bukan sukses dengan data kosong
+        raise AirflowException(f"Tabel {schema}.{table} gagal diambil atau disimpan: {summary}")
+    return summary
 
 with DAG(
     'bps_simdasi_pipeline',
@@ -113,7 +60,12 @@ with DAG(
     schedule='0 0 * * *', 
     start_date=datetime(2025, 1, 1),
     catchup=False,
-    tags=['bps', 'data', 'serial', 'last_sunday']
+    # load_mode: 'incremental' (default) atau 'full' untuk mengganti seluruh tabel
+    # replay: True untuk membangun ulang semua tabel dari arsip respons lokal (selalu full, tanpa jaringan)
+    # unpivot: 'pandas' (melt) atau 'database' (tabel _cl dibangun di PostgreSQL)
+    # long_format: 'table' atau 'normalized' (dimensi + fakta, dengan view {table}_cl)
+    params={'load_mode': 'incremental', 'replay': False, 'unpivot': UNPIVOT_MODE, 'long_format': LONG_FORMAT},
+    tags=['bps', 'data', 'parallel', 'last_sunday']
 ) as dag:
     @task
     def task_0_check_is_last_sunday(ds=None, dag_run=None):
@@ -150,31 +102,71 @@ with DAG(
     # Variabel 'gate_task' sekarang terisi dan bisa digunakan untuk dependensi.
     gate_task = task_0_check_is_last_sunday()
 
+    @task
+    def refresh_sheet_config(params=None):
+        """
+        Memperbarui snapshot lokal Google Sheet (TTL + ETag/hash)
+        sebelum daftar tabel dibaca oleh 'get_api_configs'.
+        Dalam mode replay snapshot yang ada dipakai apa adanya.
+        """
+        from bps_helpers.sheet_config import load_sheet_snapshot, refresh_sheet_snapshot
+
+        if (params or {}).get('replay') or REPLAY_MODE:
+            snapshot = load_sheet_snapshot() or {}
+            print(f"ℹ️ Mode replay: memakai snapshot sheet versi {snapshot.get('version')} tanpa cek ulang.")
+        else:
+            snapshot = refresh_sheet_snapshot()
+        if not snapshot.get("records"):
+            # Sheet tidak bisa diakses dan belum ada snapshot lama: gagalkan run, jangan jalan kosong
+            raise AirflowException("Snapshot Google Sheet tidak tersedia atau kosong; tidak ada tabel untuk diproses.")
+        return snapshot.get("version")
+
+    refresh_task = refresh_sheet_config()
+
     with TaskGroup('process_simdasi_apis') as process_group:
-        previous_task = None
-        api_urls = get_api_urls_from_sheet()
-        
-        if not api_urls:
-            # Handle kasus jika GSheet kosong atau gagal diakses
-            print("⚠️ Tidak ada URL API yang ditemukan dari Google Sheet.")
-        
-        for i, cfg in enumerate(api_urls):
-             task_operator = PythonOperator(
-                task_id=f'process_api_{i+1}',
-                python_callable=process_simdasi_url,
-                op_kwargs={
+        @task
+        def get_api_configs(params=None):
+            """
+            Membaca daftar tabel dari snapshot saat runtime dan mengubahnya menjadi
+            op_kwargs untuk task process_api yang di-mapping secara dinamis.
+            """
+            api_urls = get_api_urls_from_sheet()
+            if not api_urls:
+                # GSheet kosong atau gagal diakses: gagal terlihat, bukan 0 task process_api
+                raise AirflowException("Tidak ada URL API yang ditemukan dari Google Sheet.")
+
+            params = params or {}
+            replay = bool(params.get('replay', False))
+            # Replay selalu full: fingerprint arsip sama dengan load terakhir
+            load_mode = 'full' if replay else params.get('load_mode', 'incremental')
+            return [
+                {
                     'url': cfg['url'],
                     'schema': cfg['schema'],
                     'table': cfg['table'],
-                    'multiply': cfg.get('multiply_flag', False) 
+                    'multiply': cfg.get('multiply_flag', False),
+                    'transform': cfg.get('transform'),
+                    'mode': load_mode,
+                    'replay': replay,
+                    'unpivot': params.get('unpivot', UNPIVOT_MODE),
+                    'long_format': params.get('long_format', LONG_FORMAT),
                 }
-            )
-             if previous_task:
-                previous_task >> task_operator
-             
-             # Set task saat ini sebagai 'previous' untuk iterasi berikutnya
-             previous_task = task_operator
+                for cfg in api_urls
+            ]
+
+        # Satu task instance per tabel, berjalan paralel.
+        # Konkurensi total dibatasi oleh Airflow pool (dibagi dengan DAG run lain)
+        # dan max_active_tis_per_dagrun; kegagalan satu tabel tidak menghentikan tabel lain.
+        PythonOperator.partial(
+            task_id='process_api',
+            python_callable=process_simdasi_url,
+            pool=SIMDASI_POOL,
+            max_active_tis_per_dagrun=SIMDASI_MAX_PARALLEL,
+            map_index_template="{{ task.op_kwargs['schema'] }}.{{ task.op_kwargs['table'] }}",
+        ).expand(op_kwargs=get_api_configs())
     
     # Task 'gate_task' (pengecekan hari Minggu) harus berhasil
-    # sebelum 'process_group' (seluruh grup pemrosesan API) dimulai.
-    gate_task >> process_group
\ No newline at end of file
+    # sebelum snapshot sheet diperbarui dan 'process_group' (seluruh grup pemrosesan API) dimulai.
+    gate_task >> refresh_task >> process_group
+
+print(f"⏱️ Parsing DAG bps_simdasi_pipeline selesai dalam {time.perf_counter() - _PARSE_START:.3f} detik.")